@@ -1,15 +1,17 @@
 import streamlit as st
 import warnings
-from docx import Document
-from docx.shared import Pt, Cm
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-import re
-from datetime import datetime
+import json
 import io
+import os
+import tempfile
 
-# Для Google API
-from googleapiclient.discovery import build
-import google.auth
+from cache import ResultCache
+from docx_zip import write_results_zip
+from formatter import DOCX_MIME, STAGE_LABELS, check_document, group_report
+from jobs import DONE, FAILED, FINISHED, QUEUED, JobQueue, QueueFull
+from metrics import MetricsRegistry, StageMetrics
+from validate import DocumentTooLarge, scan_document
+from worker_pool import WorkerPool, too_large_message
 
 warnings.filterwarnings("ignore")
 
@@ -17,6 +19,111 @@ st.set_page_config(page_title="Редактор наукових статей",
 
 st.title("📝 Автоматичне форматування статті")
 
+
+@st.cache_resource
+def get_result_cache():
+    """Спільний для всіх сесій кеш результатів (CEP_CACHE_MB — бюджет пам'яті, CEP_CACHE_DIR — кеш на диску,
+    CEP_CACHE_DISK_MB — його найбільший розмір)."""
+    return ResultCache(max_bytes=int(os.environ.get("CEP_CACHE_MB", "256")) * 1024 * 1024,
+                       disk_dir=os.environ.get("CEP_CACHE_DIR"),
+                       disk_max_bytes=int(os.environ.get("CEP_CACHE_DISK_MB", "2048")) * 1024 * 1024)
+
+
+@st.cache_resource
+def get_worker_pool():
+    """Теплий пул ізольованих процесів для обробки .docx, спільний для всіх сесій.
+
+    CEP_WORKERS — кількість процесів, CEP_MAX_UPLOAD_MB — найбільший файл,
+    CEP_TIMEOUT_S — ліміт часу на файл, CEP_MAX_RSS_MB — ліміт пам'яті воркера,
+    CEP_SPOOL_DIR — каталог тимчасових файлів.
+    """
+    return WorkerPool(workers=int(os.environ.get("CEP_WORKERS", os.cpu_count() or 2)),
+                      max_upload_bytes=int(os.environ.get("CEP_MAX_UPLOAD_MB", "50")) * 1024 * 1024,
+                      timeout=float(os.environ.get("CEP_TIMEOUT_S", "120")),
+                      max_rss_bytes=int(os.environ.get("CEP_MAX_RSS_MB", "1024")) * 1024 * 1024,
+                      spool_dir=os.environ.get("CEP_SPOOL_DIR"))
+
+
+@st.cache_resource
+def get_metrics_registry():
+    """Метрики етапів по всіх файлах; CEP_METRICS_FILE — файл у форматі Prometheus.
+
+    CEP_TRACE_MEMORY=1 вмикає tracemalloc у воркерах пулу, де й іде обробка."""
+    return MetricsRegistry()
+
+
+@st.cache_resource
+def get_job_queue():
+    """Персистентна черга завдань (CEP_JOBS_DIR — каталог, CEP_QUEUE_DEPTH — найбільша черга,
+    CEP_JOB_TTL_H — скільки годин зберігати результати). Диспетчерів стільки ж, скільки воркерів."""
+    metrics_registry = get_metrics_registry()
+
+    def on_finished(job):
+        if job["from_cache"]:
+            metrics_registry.observe_cache_hit()
+        elif job["status"] == DONE:
+            metrics_registry.observe(job["metrics"])
+        if os.environ.get("CEP_METRICS_FILE"):
+            metrics_registry.write_prometheus(os.environ["CEP_METRICS_FILE"])
+
+    return JobQueue(os.environ.get("CEP_JOBS_DIR", os.path.join(tempfile.gettempdir(), "cep_bsmu_jobs")),
+                    get_worker_pool(),
+                    max_queued=int(os.environ.get("CEP_QUEUE_DEPTH", "100")),
+                    cache=get_result_cache(),
+                    on_finished=on_finished,
+                    ttl=float(os.environ.get("CEP_JOB_TTL_H", "72")) * 3600)
+
+
+def job_note(job):
+    if job["from_cache"]:
+        return "з кешу"
+    return f"у черзі {job['wait_s']:.1f} с, обробка {job['processing_s']:.2f} с"
+
+
+def show_job_row(container, job, language, article_type):
+    """Показує звіт одного завершеного завдання; повертає повний звіт."""
+    if job["status"] == FAILED:
+        container.error(f"{job['file_name']}: {job['error']}")
+        return [job["error"]]
+    report = job["report"] + check_document(job["texts"], language, article_type)
+    problems = sum(1 for line in report if line.startswith(("⚠️", "❌")))
+    with container.expander(f"{'⚠️' if problems else '✅'} {job['file_name']} ({job_note(job)})", expanded=False):
+        for it in dict.fromkeys(report):
+            st.write(f"- {it}")
+    return report
+
+
+def check_upload(upload):
+    """Лише перевірка файлу в процесі Streamlit: (звіт, тексти) або (рядок помилки, None)."""
+    max_bytes = get_worker_pool().max_upload_bytes
+    if max_bytes is not None and upload.size > max_bytes:
+        return too_large_message(upload.size, max_bytes), None
+    try:
+        return scan_document(upload, upload.name)
+    except DocumentTooLarge as exc:
+        return str(exc), None
+    except Exception as exc:
+        return f"❌ Помилка обробки: {type(exc).__name__}: {exc}", None
+
+
+@st.fragment(run_every=1.0)
+def show_job_progress(job_ids, language, article_type):
+    """Опитує стан завдань; коли всі завершені — перезапускає сторінку для повного звіту."""
+    jobs = [job for job in map(get_job_queue().get, job_ids) if job is not None]
+    finished = sum(1 for job in jobs if job["status"] in FINISHED)
+    st.progress(finished / max(len(jobs), 1), text=f"Оброблено {finished} з {len(jobs)}")
+    for job in jobs:
+        if job["status"] == QUEUED:
+            st.write(f"⏳ {job['file_name']} — у черзі (позиція {job['position']})")
+        elif job["status"] in FINISHED:
+            show_job_row(st, job, language, article_type)
+        else:
+            st.write(f"⚙️ {job['file_name']} — обробляється")
+    st.caption("Результат збережено на сервері: сторінку можна оновити або повернутися за цим посиланням пізніше.")
+    if finished == len(jobs):
+        st.rerun()
+
+
 # ============================================================
 # 1️⃣ ІНТЕРФЕЙС STREAMLIT (Замість Radio Buttons Colab)
 # ============================================================
@@ -43,376 +150,128 @@ with col2:
     )
     article_type = article_type_choice[1]
 
-uploaded_file = st.file_uploader("Завантажте файл .docx", type=["docx"])
+uploaded_files = st.file_uploader("Завантажте файл .docx (можна кілька)", type=["docx"], accept_multiple_files=True)
+
+# Кнопка запуску: файли стають завданнями в черзі, їхні ідентифікатори — в адресі сторінки,
+# тож результат доступний і після оновлення сторінки чи перезапуску сервера
+if st.button("🚀 Обробити статтю") and uploaded_files:
+    job_ids = []
+    for upload in uploaded_files:
+        try:
+            job_ids.append(get_job_queue().submit(upload, upload.name))
+        except QueueFull as exc:
+            st.error(f"{upload.name}: {exc}")
+    st.query_params["job"] = job_ids
+    st.session_state.pop("checked", None)
+
+# Лише перевірка: без черги й виправленої копії, текст читається з .docx потоково (validate.py)
+if st.button("🔍 Лише перевірити (без форматування)") and uploaded_files:
+    st.session_state["checked"] = [(upload.name, *check_upload(upload)) for upload in uploaded_files]
+    st.query_params.clear()
 
-# Кнопка запуску
-if st.button("🚀 Обробити статтю") and uploaded_file is not None:
-    
-    # ============================================================
-    # 2️⃣ ГОЛОВНА ЛОГІКА (БЕЗ ЗМІН В АЛГОРИТМІ)
-    # ============================================================
-    
-    report = []
-    
-    # Завантаження
-    doc = Document(uploaded_file)
-    file_name = uploaded_file.name
-    report.append("Файл завантажено: " + file_name)
-
-    # 2.3 Перевірка та виправлення полів сторінки
-    section = doc.sections[0]
-    if section.top_margin != Cm(2):
-        section.top_margin = Cm(2)
-        report.append("Виправлено верхнє поле на 2 см")
-    if section.bottom_margin != Cm(2):
-        section.bottom_margin = Cm(2)
-        report.append("Виправлено нижнє поле на 2 см")
-    if section.right_margin != Cm(2):
-        section.right_margin = Cm(2)
-        report.append("Виправлено праве поле на 2 см")
-    if section.left_margin != Cm(2):
-        section.left_margin = Cm(2)
-        report.append("Виправлено ліве поле на 2 см")
-
-    # 2.4 Перевірка та виправлення формату тексту
-    for paragraph in doc.paragraphs:
-        paragraph_format = paragraph.paragraph_format
-        paragraph_format.line_spacing = 1.5
-        paragraph_format.space_before = Pt(0)
-        paragraph_format.space_after = Pt(0)
-        if paragraph.alignment == WD_ALIGN_PARAGRAPH.JUSTIFY:
-            paragraph_format.first_line_indent = Cm(1.25)
-        for run in paragraph.runs:
-            run.font.name = "Times New Roman"
-            run.font.size = Pt(14)
-    report.append("Перевірено та виправлено формат тексту")
-
-    # 2.5 УДК, назва та автори
-    paragraphs = doc.paragraphs
-
-    # ---- УДК ----
-    if len(paragraphs) >= 1:
-        first = paragraphs[0]
-        if not first.text.startswith("УДК"):
-            first.text = "УДК 000.00"
-            report.append("Додано УДК")
-        for run in first.runs:
-            run.font.bold = True
-        report.append("УДК перевірено/виправлено")
-
-    # ---- Назва статті ----
-    if len(paragraphs) >= 2:
-        title_para = paragraphs[1]
-        title_text = title_para.text.replace("\n", " ").strip().upper()
-        title_para.text = title_text
-        for run in title_para.runs:
-            run.font.bold = True
-        report.append("Назва статті перевірена та приведена до формату (великими літерами, один абзац, жирний)")
-
-        # ---- Автори ----
-        if len(paragraphs) >= 3:
-            authors_para = paragraphs[2]
-            authors_list = authors_para.text.split(',')
-            new_authors = []
-            for author in authors_list:
-                author = author.strip()
-                parts = author.split()
-                if len(parts) >= 2:
-                    if parts[0].endswith("."): 
-                        initials = parts[0]
-                        surname = parts[1]
-                        rest = " ".join(parts[2:])
-                    else:
-                        surname = parts[0]
-                        initials = parts[1]
-                        rest = " ".join(parts[2:])
-                    author_text = f"{initials} {surname}"
-                    if rest: author_text += f" {rest}"
-                    new_authors.append(author_text)
-                else:
-                    new_authors.append(author)
-            
-            authors_para.text = ", ".join(new_authors)
-            for run in authors_para.runs:
-                run.font.bold = True
-                run.font.italic = True
-            report.append("Автори перевірені та відформатовані (жирний + курсив, ініціали перед прізвищем, цифри афіліацій збережені)")
-
-    # Афіліація та анотація
-    max_affiliation_number = 0
-    if len(paragraphs) >= 3:
-        authors_para = paragraphs[2]
-        numbers = re.findall(r'\d+', authors_para.text)
-        if numbers:
-            max_affiliation_number = max([int(n) for n in numbers])
-
-    affiliation_start = 3
-    affiliation_end = affiliation_start + max_affiliation_number if max_affiliation_number > 0 else affiliation_start + 1
-    
-    affiliation_paragraphs = paragraphs[affiliation_start:affiliation_end]
-    for para in affiliation_paragraphs:
-        for run in para.runs:
-            run.font.bold = False
-            run.font.italic = False
-    report.append(f"Афіліація авторів перевірена ({affiliation_end - affiliation_start} рядків)")
-
-    # Анотація
-    abstract_start = affiliation_end
-    abstract_end = abstract_start
-    keywords_found = False
-    for i in range(abstract_start, len(paragraphs)):
-        para_text_lower = paragraphs[i].text.lower()
-        if "ключові слова" in para_text_lower or "keywords" in para_text_lower:
-            abstract_end = i + 1
-            keywords_found = True
-            break
-    if not keywords_found: abstract_end = len(paragraphs)
-
-    abstract_paragraphs = paragraphs[abstract_start:abstract_end]
-    abstract_text = ""
-    for para in abstract_paragraphs:
-        abstract_text += para.text + "\n"
-        para.paragraph_format.first_line_indent = None
-        for run in para.runs:
-            current_bold = run.font.bold
-            run.font.italic = True
-            if current_bold is not None: run.font.bold = current_bold
-
-    abstract_length = len(abstract_text)
-    if abstract_length < 1800 or abstract_length > 2500:
-        report.append(f"⚠️ Попередження: довжина анотації {abstract_length} символів (рекомендовано 1800–2500)")
-    report.append("Анотація перевірена та відформатована (курсив)")
-
-    # 2.X ДРУГА МОВНА ВЕРСІЯ
-    second_start = abstract_end
-    while second_start < len(paragraphs) and not paragraphs[second_start].text.strip():
-        second_start += 1
-
-    if second_start < len(paragraphs):
-        title2_para = paragraphs[second_start]
-        title2_text = title2_para.text.replace("\n", " ").strip().upper()
-        title2_para.text = title2_text
-        for run in title2_para.runs: run.font.bold = True
-        report.append("Назва другою мовою перевірена та приведена до формату")
-
-        authors2_index = second_start + 1
-        while authors2_index < len(paragraphs) and not paragraphs[authors2_index].text.strip():
-            authors2_index += 1
-
-        if authors2_index < len(paragraphs):
-            authors2_para = paragraphs[authors2_index]
-            authors_list = authors2_para.text.split(',')
-            new_authors = []
-            for author in authors_list:
-                author = author.strip()
-                parts = author.split()
-                if len(parts) >= 2:
-                    if parts[0].endswith("."):
-                        initials, surname = parts[0], parts[1]
-                        rest = " ".join(parts[2:])
-                    else:
-                        surname, initials = parts[0], parts[1]
-                        rest = " ".join(parts[2:])
-                    author_text = f"{initials} {surname}"
-                    if rest: author_text += f" {rest}"
-                    new_authors.append(author_text)
-                else: new_authors.append(author)
-            authors2_para.text = ", ".join(new_authors)
-            for run in authors2_para.runs:
-                run.font.bold, run.font.italic = True, True
-            report.append("Автори другою мовою відформатовані")
-
-            affiliation2_start = authors2_index + 1
-            affiliation2_end = affiliation2_start + (affiliation_end - affiliation_start)
-            affiliation2_paragraphs = paragraphs[affiliation2_start:affiliation2_end]
-            for para in affiliation2_paragraphs:
-                for run in para.runs:
-                    run.font.bold, run.font.italic = False, False
-            report.append(f"Афіліація другою мовою перевірена ({len(affiliation2_paragraphs)} рядків)")
-
-            abstract2_start = affiliation2_end
-            abstract2_end = abstract2_start
-            keywords2_found = False
-            for i in range(abstract2_start, len(paragraphs)):
-                para_text_lower = paragraphs[i].text.lower()
-                if "ключові слова" in para_text_lower or "keywords" in para_text_lower:
-                    abstract2_end = i + 1
-                    keywords2_found = True
-                    break
-            if not keywords2_found: abstract2_end = len(paragraphs)
-            
-            abstract2_paragraphs = paragraphs[abstract2_start:abstract2_end]
-            for para in abstract2_paragraphs:
-                para.paragraph_format.first_line_indent = None
-                for run in para.runs:
-                    current_bold = run.font.bold
-                    run.font.italic = True
-                    if current_bold is not None: run.font.bold = current_bold
-            report.append("Анотація другою мовою перевірена та відформатована (курсив)")
-
-    # 3. Перевірка наявності структурних елементів
-    required_elements = {
-        "uk": { 
-            "original": {
-                "abstract_uk": ["Мета дослідження", "Матеріали і методи", "Результати", "Висновки", "Ключові слова"],
-                "abstract_en": ["Objective", "Materials and methods", "Results", "Conclusions", "Key words"],
-                "main_text": ["Вступ", "Мета роботи", "Матеріал і методи дослідження", "Результати та їх обговорення", "Висновки", "Перспективи подальших досліджень", "Список літератури", "References", "Відомості про авторів"]
-            },
-            "case": {
-                "abstract_uk": ["Висновки"], "abstract_en": ["Conclusions"],
-                "main_text": ["Вступ", "Опис клінічного випадку", "Висновки", "Список літератури", "References", "Відомості про авторів"]
-            },
-            "review": {
-                "abstract_uk": ["Мета роботи", "Основна частина", "Висновки"],
-                "abstract_en": ["Objective", "Main Text", "Conclusions"],
-                "main_text": ["Вступ", "Мета роботи", "Основна частина", "Висновки", "Список літератури", "References", "Відомості про авторів"]
-            }
-        },
-        "en": {
-            "original": {
-                "abstract_en": ["Objective", "Materials and methods", "Results", "Conclusions", "Key words"],
-                "abstract_uk": ["Мета дослідження", "Матеріали і методи", "Результати", "Висновки", "Ключові слова"],
-                "main_text": ["Introduction", "Objective", "Materials and Methods", "Results and Discussion", "Conclusions", "Prospects for further research", "References", "Information about authors"]
-            },
-            "case": {
-                "abstract_en": ["Conclusions"], "abstract_uk": ["Висновки"],
-                "main_text": ["Introduction", "Case description", "Conclusions", "References", "Information about authors"]
-            },
-            "review": {
-                "abstract_en": ["Objective", "Materials and methods", "Results", "Conclusions", "Key words"],
-                "abstract_uk": ["Мета дослідження", "Матеріали і методи", "Результати", "Висновки", "Ключові слова"],
-                "main_text": ["Introduction", "Objective", "Main part", "Conclusions", "References", "Information about authors"]
-            }
-        }
-    }
-
-    selected_structure = required_elements[language][article_type]
-    missing_elements = []
-    for section_name, elements in selected_structure.items():
-        for element in elements:
-            found = False
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip().lower().startswith(element.lower()):
-                    found = True
-                    break
-            if not found: missing_elements.append(f"{section_name}: {element}")
-
-    if missing_elements:
-        report.append("❌ Відсутні або неправильно оформлені структурні елементи:")
-        for item in missing_elements: report.append(f"   - {item}")
-    else: report.append("✅ Усі обов’язкові структурні елементи присутні та оформлені правильно")
-
-    # ============================================================
-    # ПЕРЕВІРКА ЛІТЕРАТУРИ (ОНОВЛЕНА ВЕРСІЯ)
-    # ============================================================
-    references_start, references_title = None, None
-    stop_titles = []
-
-    # 1️⃣ Шукаємо початок та визначаємо умови завершення
-    for i, para in enumerate(paragraphs):
-        text_lower = para.text.strip().lower()
-        
-        if text_lower.startswith("список літератури"):
-            references_start = i + 1
-            references_title = para.text.strip()
-            stop_titles = ["references"]  # Якщо почали з укр, зупиняємось на англ
-            break
-        elif text_lower.startswith("references"):
-            references_start = i + 1
-            references_title = para.text.strip()
-            stop_titles = ["відомості про авторів", "information about authors"]  # Якщо почали з англ
-            break
-
-    if references_start is None:
-        report.append("❌ Не знайдено розділ літератури")
-    else:
-        reference_paragraphs = []
-        for para in paragraphs[references_start:]:
-            text = para.text.strip()
-            if not text: 
-                continue
-            
-            text_lower = text.lower()
-            
-            # 🛑 Перевірка на "стоп-заголовки" за вашою умовою
-            if any(text_lower.startswith(st) for st in stop_titles):
-                break
-                
-            # 🛑 Додаткова перевірка на контактну інформацію (залишаємо для надійності)
-            if re.search(r"(author|email|e-mail|correspondence|адреса|контакт)", text_lower):
-                break
-
-            reference_paragraphs.append(text)
-        
-        reference_count = len(reference_paragraphs)
-        
-        # --- Перевірка кількості ---
-        if article_type in ["original", "case"]:
-            if reference_count > 15: 
-                report.append(f"⚠️ Джерел: {reference_count} (допустимо не більше 15)")
-            else: 
-                report.append(f"Кількість джерел: {reference_count}")
-        elif article_type == "review":
-            if reference_count < 50: 
-                report.append(f"⚠️ Джерел: {reference_count} (для огляду потрібно не менше 50)")
-            else: 
-                report.append(f"Кількість джерел: {reference_count}")
-
-        # --- Базова перевірка Vancouver ---
-        expected_number, numbering_errors, vancouver_errors = 1, False, False
-        for ref in reference_paragraphs:
-            # Перевірка нумерації
-            match = re.match(r"^(\d+)[\.\)]", ref)
-            if match:
-                if int(match.group(1)) != expected_number: 
-                    numbering_errors = True
-                expected_number += 1
-            else: 
-                numbering_errors = True
-            
-            # Перевірка року (має бути 4 цифри)
-            if not re.search(r"\b(19|20)\d{2}\b", ref): 
-                vancouver_errors = True
-        
-        if vancouver_errors: 
-            report.append("⚠️ Можливе порушення Vancouver style (не знайдено рік або порушено формат)")
-        else: 
-            report.append("Стиль літератури виглядає коректним (базова перевірка)")
-            
-        report.append(f"Перевірено розділ: {references_title}")
-
-    # 2.6 Збереження файлу в пам'ять для завантаження
-    bio = io.BytesIO()
-    doc.save(bio)
+# ============================================================
+# 2️⃣ РЕЗУЛЬТАТИ ЗАВДАНЬ (обробка — у jobs.py / worker_pool.py)
+# ============================================================
+
+job_ids = st.query_params.get_all("job")
+jobs = [job for job in map(get_job_queue().get, job_ids) if job is not None]
+checked = None if job_ids else st.session_state.get("checked")
+
+if checked:
+    st.subheader("=== ЗВІТ ПЕРЕВІРКИ (без форматування) ===")
+    for file_name, report, texts in checked:
+        if texts is None:
+            st.error(f"{file_name}: {report}")
+            continue
+        report = report + check_document(texts, language, article_type)
+        problems = sum(1 for line in report if line.startswith(("⚠️", "❌")))
+        with st.expander(f"{'⚠️' if problems else '✅'} {file_name}", expanded=len(checked) == 1):
+            for it in dict.fromkeys(report):
+                st.write(f"- {it}")
+    st.info("Файли не змінювалися. Щоб отримати виправлену версію, натисніть «🚀 Обробити статтю».")
+
+elif jobs and any(job["status"] not in FINISHED for job in jobs):
+    show_job_progress([job["id"] for job in jobs], language, article_type)
+
+elif len(jobs) == 1 and jobs[0]["status"] == FAILED:
+    # Завеликий файл, ліміт часу чи пам'яті або помилка обробки
+    st.subheader("=== ЗВІТ ПРО ВНЕСЕНІ ЗМІНИ ===")
+    st.error(jobs[0]["error"])
+
+elif len(jobs) == 1:
+    job = jobs[0]
+    file_name = job["file_name"]
+
+    # 3. Перевірки залежать лише від мови й типу статті: при зміні перемикачів
+    # вони виконуються заново над збереженими текстами, без повторної обробки .docx
+    check_metrics = StageMetrics()
+    report = job["report"] + check_document(job["texts"], language, article_type, stage_timer=check_metrics)
+    stages = {**job["metrics"], **check_metrics.to_dict()}
     
     # 2.7 Відображення звіту в Streamlit
     st.subheader("=== ЗВІТ ПРО ВНЕСЕНІ ЗМІНИ ===")
     
-    sections = {"Файл": [], "Поля сторінки": [], "Формат тексту": [], "Назва/УДК/Автори": [], "Інше": []}
-    for item in report:
-        if "Файл завантажено" in item: sections["Файл"].append(item)
-        elif "поле" in item: sections["Поля сторінки"].append(item)
-        elif any(x in item for x in ["шрифт", "міжрядковий", "відступ", "формат тексту"]): sections["Формат тексту"].append(item)
-        elif any(x in item for x in ["УДК", "Назва", "Автори"]): sections["Назва/УДК/Автори"].append(item)
-        else: sections["Інше"].append(item)
-
-    for sec, items in sections.items():
-        if items:
-            with st.expander(f"📌 {sec}", expanded=True):
-                for it in list(dict.fromkeys(items)):
-                    st.write(f"- {it}")
-
-    st.success("Готово ✅ Файл відформатовано.")
+    for sec, items in group_report(report).items():
+        with st.expander(f"📌 {sec}", expanded=True):
+            for it in items:
+                st.write(f"- {it}")
+
+    # 2.8 Продуктивність (час у черзі, час, CPU та пам'ять Python кожного етапу)
+    with st.expander(f"⏱ Продуктивність ({job_note(job)})", expanded=False):
+        traced = any("peak_bytes" in stage for stage in stages.values())
+        st.table([{
+            "Етап": STAGE_LABELS.get(name, name),
+            "Час, мс": round(stage["wall_s"] * 1000, 1),
+            "CPU, мс": round(stage["cpu_s"] * 1000, 1),
+            "Δ блоків Python": stage["alloc_blocks"],
+            **({"Пік Python, КБ": round(stage["peak_bytes"] / 1024) if "peak_bytes" in stage else None} if traced else {}),
+        } for name, stage in stages.items()])
+        st.caption("Δ блоків Python — чиста зміна кількості об'єктів Python за етап (буває від'ємною). "
+                   "Пам'ять lxml/libxml2, яка переважає в завантаженні та збереженні, тут не врахована; "
+                   "пік Python — лише з CEP_TRACE_MEMORY=1.")
+        st.download_button("Метрики (JSON)", json.dumps({"wait_s": job["wait_s"], "processing_s": job["processing_s"],
+                                                         "stages": stages}, indent=2),
+                           file_name=f"metrics_{file_name}.json", mime="application/json")
+
+    st.success("Готово ✅ Файл відформатовано." + (" (результат з кешу)" if job["from_cache"] else ""))
     
     # Кнопка завантаження
     st.download_button(
         label="📥 Завантажити виправлений файл",
-        data=bio.getvalue(),
+        data=get_job_queue().result(job["id"]),
         file_name=f"fixed_{file_name}",
-        mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+        mime=DOCX_MIME
     )
 
+elif jobs:
+
+    # 2.7 Звіти по кожному файлу (перевірки — для поточних мови й типу статті)
+    st.subheader(f"=== ЗВІТИ ({len(jobs)} файлів) ===")
+    named_reports = []
+    for job in jobs:
+        named_reports.append((job["file_name"], show_job_row(st, job, language, article_type)))
+
+    failed = sum(1 for job in jobs if job["status"] == FAILED)
+    if failed:
+        st.warning(f"Не вдалося обробити файлів: {failed}")
+    st.success(f"Готово ✅ Відформатовано файлів: {len(jobs) - failed}.")
+
+    # Архів: виправлені файли + зведений звіт (TXT і JSON); перебудовується лише при зміні параметрів
+    archive_key = (tuple(job_ids), language, article_type)
+    if st.session_state.get("archive_key") != archive_key:
+        st.session_state["archive"] = write_results_zip(
+            io.BytesIO(),
+            [(f"fixed_{job['file_name']}", get_job_queue().result(job["id"])) for job in jobs if job["status"] == DONE],
+            [("report.txt", "\n\n".join(f"=== {name} ===\n" + "\n".join(report) for name, report in named_reports)),
+             ("report.json", json.dumps(dict(named_reports), ensure_ascii=False, indent=2))],
+        ).getvalue()
+        st.session_state["archive_key"] = archive_key
+    st.download_button(
+        label="📦 Завантажити всі файли та звіт (ZIP)",
+        data=st.session_state["archive"],
+        file_name="fixed_articles.zip",
+        mime="application/zip"
+    )
 
-
-elif uploaded_file is None:
+elif not uploaded_files:
     st.info("Будь ласка, завантажте файл, щоб почати.")
\ No newline at end of file
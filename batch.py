@@ -0,0 +1,111 @@
+"""Пакетна обробка каталогу .docx файлів без Streamlit.
+
+Приклад:
+    python batch.py submissions/ -o fixed/ --language uk --article-type original --workers 8
+    python batch.py submissions/ -o reports/ --check-only    # лише звіти, без виправлених файлів
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from cache import ResultCache, process_document_cached
+from formatter import ARTICLE_TYPES, LANGUAGES, TEXT_FORMATTERS, process_document
+from metrics import MetricsRegistry, StageMetrics
+from validate import validate_document
+
+
+def process_file(path, output_dir, language, article_type, text_format="xml", cache_dir=None, check_only=False,
+                 cache_disk_bytes=None):
+    """Обробляє (або лише перевіряє) один файл у процесі-воркері та повертає результат для JSON."""
+    path = Path(path)
+    started = time.perf_counter()
+    out_path = Path(output_dir) / f"fixed_{path.name}"
+    result = {"file": path.name, "language": language, "article_type": article_type}
+    try:
+        stage_metrics = StageMetrics()
+        if check_only:
+            with open(path, "rb") as src:
+                report = validate_document(src, language, article_type, file_name=path.name, stage_timer=stage_metrics)
+        elif cache_dir:
+            cache = ResultCache(max_bytes=0, disk_dir=cache_dir, disk_max_bytes=cache_disk_bytes)
+            with open(path, "rb") as src:
+                fixed, report, result["cached"] = process_document_cached(cache, src, language, article_type,
+                                                                          file_name=path.name, text_format=text_format,
+                                                                          stage_timer=stage_metrics)
+            out_path.write_bytes(fixed)
+        else:
+            with open(path, "rb") as src, open(out_path, "wb") as dst:
+                _, report = process_document(src, language, article_type, file_name=path.name,
+                                             text_format=text_format, out=dst, stage_timer=stage_metrics)
+        if not check_only:
+            result["output"] = str(out_path)
+        result.update(status="ok", report=report, metrics=stage_metrics.to_dict())
+    except Exception as exc:
+        if not check_only:
+            out_path.unlink(missing_ok=True)
+        result.update(status="error", error=f"{type(exc).__name__}: {exc}")
+    result["seconds"] = round(time.perf_counter() - started, 4)
+    return result
+
+
+def run_batch(input_dir, output_dir, language="uk", article_type="original", workers=None, text_format="xml",
+              cache_dir=None, check_only=False, cache_disk_bytes=None):
+    input_dir, output_dir = Path(input_dir), Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    files = sorted(p for p in input_dir.glob("*.docx") if not p.name.startswith("~$"))
+
+    results = []
+    registry = MetricsRegistry()
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = [pool.submit(process_file, p, output_dir, language, article_type, text_format, cache_dir, check_only,
+                               cache_disk_bytes)
+                   for p in files]
+        for future in as_completed(futures):
+            result = future.result()
+            # Суфікс .report.json: звіт файлу summary.docx чи metrics.docx не перезапише зведені файли
+            report_path = output_dir / f"{Path(result['file']).stem}.report.json"
+            report_path.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+            results.append(result)
+            if result.get("cached"):
+                registry.observe_cache_hit()
+            elif result.get("metrics"):
+                registry.observe(result["metrics"])
+            print(f"[{result['status']}] {result['file']} ({result['seconds']} с)", file=sys.stderr)
+    # Зведені метрики етапів по всіх файлах
+    (output_dir / "metrics.json").write_text(registry.to_json(), encoding="utf-8")
+    registry.write_prometheus(output_dir / "metrics.prom")
+    return sorted(results, key=lambda r: r["file"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Форматування каталогу статей для журналу «Клінічна та експериментальна патологія»")
+    parser.add_argument("input_dir", help="каталог з .docx файлами")
+    parser.add_argument("-o", "--output-dir", default="fixed", help="куди зберегти виправлені файли та звіти (за замовчуванням: fixed)")
+    parser.add_argument("--language", choices=LANGUAGES, default="uk")
+    parser.add_argument("--article-type", choices=ARTICLE_TYPES, default="original")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="кількість процесів (за замовчуванням: усі ядра)")
+    parser.add_argument("--text-format", choices=sorted(TEXT_FORMATTERS), default="xml",
+                        help="форматування тексту: xml (швидко) або docx (через python-docx, для порівняння)")
+    parser.add_argument("--cache-dir", default=None, help="каталог кешу результатів: незмінені файли не обробляються повторно")
+    parser.add_argument("--cache-disk-mb", type=float, default=float(os.environ.get("CEP_CACHE_DISK_MB", "2048")),
+                        help="найбільший розмір кешу на диску, МБ (за замовчуванням: CEP_CACHE_DISK_MB або 2048)")
+    parser.add_argument("--check-only", action="store_true",
+                        help="лише перевірка: звіти без форматування й виправлених файлів (швидко)")
+    args = parser.parse_args(argv)
+
+    results = run_batch(args.input_dir, args.output_dir, args.language, args.article_type, args.workers, args.text_format,
+                        args.cache_dir, args.check_only, int(args.cache_disk_mb * 1024 * 1024))
+    summary_path = Path(args.output_dir) / "summary.json"
+    summary_path.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    failed = sum(1 for r in results if r["status"] != "ok")
+    print(f"Оброблено {len(results)} файлів, помилок: {failed}. Звіт: {summary_path}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
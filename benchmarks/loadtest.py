@@ -0,0 +1,162 @@
+"""Навантажувальний тест HTTP API (service.py).
+
+Приклади (з кореня репозиторію, сервіс уже запущено):
+    python service.py --port 8080 --cache-mb 0
+    python -m benchmarks.loadtest --url http://127.0.0.1:8080 -c 16 -n 400 -o load.json
+
+-c з'єднань (keep-alive) надсилають запити POST /format паралельно, кожне —
+послідовно. Документи — синтетичні рукописи (--variants різних, по колу) або
+власний .docx (--file). Звіт: запитів за секунду, p50/p95/p99 затримки,
+коди відповідей.
+
+Як і curl, для тіл понад 1 МБ клієнт надсилає «Expect: 100-continue» і чекає
+на «100 Continue» до секунди, перш ніж надіслати тіло (--expect auto); сервер,
+що не відповідає на цей заголовок, отримує цю секунду в затримці кожного запиту.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from urllib.parse import urlencode, urlsplit
+
+from benchmarks.run import SCENARIOS
+from benchmarks.synthetic import make_manuscript
+from formatter import DOCX_MIME
+
+# Як у curl: поріг тіла для «Expect: 100-continue» і скільки чекати на відповідь
+EXPECT_THRESHOLD = 1024 * 1024
+EXPECT_TIMEOUT = 1.0
+
+
+async def _request(reader, writer, host, path, body, expect="auto"):
+    expect = expect == "always" or (expect == "auto" and len(body) > EXPECT_THRESHOLD)
+    head = (f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: {DOCX_MIME}\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: keep-alive\r\n"
+            + ("Expect: 100-continue\r\n" if expect else "") + "\r\n").encode("latin-1")
+    status_line = None
+    if expect:
+        writer.write(head)
+        await writer.drain()
+        try:
+            status_line = await asyncio.wait_for(reader.readline(), EXPECT_TIMEOUT)
+        except asyncio.TimeoutError:
+            pass                        # сервер мовчить — тіло надсилається без підтвердження
+        if status_line is None or int(status_line.split()[1]) == 100:
+            writer.write(body)
+    else:
+        writer.write(head + body)
+    await writer.drain()
+    status_line = status_line or await reader.readline()
+    while int(status_line.split()[1]) == 100:
+        await reader.readline()         # порожній рядок після 100 Continue
+        status_line = await reader.readline()
+    status = int(status_line.split()[1])
+    length, keep_alive = 0, True
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+        elif name.lower() == "connection":
+            keep_alive = value.strip().lower() != "close"
+    await reader.readexactly(length)
+    return status, keep_alive
+
+
+async def _connection(url, path, documents, counter, total, latencies, statuses, expect):
+    reader = writer = None
+    while True:
+        index = next(counter)
+        if index >= total:
+            break
+        if writer is None:
+            reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+        started = time.perf_counter()
+        try:
+            status, keep_alive = await _request(reader, writer, url.netloc, path, documents[index % len(documents)],
+                                                 expect)
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError):
+            status, keep_alive = "connection error", False
+        latencies.append(time.perf_counter() - started)
+        statuses[status] = statuses.get(status, 0) + 1
+        if not keep_alive:
+            writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+def _percentiles(samples):
+    if len(samples) < 2:
+        value = samples[0] if samples else 0.0
+        return {"p50": value, "p95": value, "p99": value}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98]}
+
+
+async def run_load(base_url, documents, concurrency=8, requests=200, language="uk", article_type="original",
+                   expect="auto"):
+    url = urlsplit(base_url)
+    path = "/format?" + urlencode({"language": language, "article_type": article_type})
+    counter = iter(range(requests + concurrency))
+    latencies, statuses = [], {}
+    started = time.perf_counter()
+    await asyncio.gather(*(_connection(url, path, documents, counter, requests, latencies, statuses, expect)
+                           for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    ok = sum(count for status, count in statuses.items() if status == 200)
+    return {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "expect": expect,
+        "elapsed_s": elapsed,
+        "requests_per_s": len(latencies) / elapsed,
+        "ok_per_s": ok / elapsed,
+        "latency_s": {**_percentiles(latencies), "mean": statistics.fmean(latencies) if latencies else 0.0,
+                      "max": max(latencies, default=0.0)},
+        "statuses": {str(status): count for status, count in sorted(statuses.items(), key=str)},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Навантажувальний тест HTTP API форматування")
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="паралельних keep-alive з'єднань")
+    parser.add_argument("-n", "--requests", type=int, default=200)
+    parser.add_argument("--file", help=".docx для всіх запитів замість синтетичних рукописів")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="small")
+    parser.add_argument("--variants", type=int, default=20,
+                        help="різних синтетичних рукописів (щоб запити не обслуговувалися з кешу)")
+    parser.add_argument("--language", default="uk")
+    parser.add_argument("--expect", choices=("auto", "always", "never"), default="auto",
+                        help="«Expect: 100-continue»: як curl (тіла понад 1 МБ), завжди або ніколи")
+    parser.add_argument("-o", "--output", help="JSON з результатом")
+    args = parser.parse_args(argv)
+
+    params = dict(SCENARIOS[args.scenario])
+    article_type = params.pop("article_type")
+    if args.file:
+        with open(args.file, "rb") as f:
+            documents = [f.read()]
+    else:
+        documents = [make_manuscript(seed=seed, **params) for seed in range(args.variants)]
+
+    result = asyncio.run(run_load(args.url, documents, args.concurrency, args.requests, args.language, article_type,
+                                  args.expect))
+    latency = result["latency_s"]
+    print(f"{result['requests']} запитів, {result['concurrency']} з'єднань, {result['elapsed_s']:.2f} с: "
+          f"{result['requests_per_s']:.1f} req/s  p50 {latency['p50'] * 1000:.0f} ms  "
+          f"p95 {latency['p95'] * 1000:.0f} ms  p99 {latency['p99'] * 1000:.0f} ms  коди: {result['statuses']}",
+          file=sys.stderr)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    return 0 if result["statuses"].get("200") == result["requests"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+"""Бенчмарк конвеєра форматування на синтетичних рукописах.
+
+Приклади (з кореня репозиторію):
+    python -m benchmarks.run -o bench.json
+    python -m benchmarks.run --scenario review --repeat 10 -o bench.json --compare bench_main.json
+
+Для кожного сценарію вимірюється час кожного етапу process_document()
+(load, margins, text_format, segment, header, second_language, structure,
+references, save) і всього прогону, пропускна здатність та пам'ять: пік купи
+Python (tracemalloc) і пік RSS окремого процесу, що обробляє лише цей файл
+(враховує й пам'ять lxml/libxml2). Результат — JSON, який можна порівнювати
+між комітами (--compare).
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from importlib import metadata
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:     # Windows
+    resource = None
+
+from benchmarks.synthetic import make_manuscript
+from formatter import PIPELINE_VERSION, SAVE_MODES, STAGES, TEXT_FORMATTERS, process_document
+
+# Сценарій = параметри make_manuscript + тип статті
+SCENARIOS = {
+    "small": dict(article_type="original", paragraphs=60, runs_per_paragraph=3, references=15),
+    "medium": dict(article_type="original", paragraphs=400, runs_per_paragraph=6, references=15, images=2, tables=3),
+    "fragmented": dict(article_type="original", paragraphs=500, runs_per_paragraph=40, references=15),
+    "review": dict(article_type="review", paragraphs=2000, runs_per_paragraph=4, references=300, tables=6),
+    "images": dict(article_type="case", paragraphs=100, runs_per_paragraph=4, references=10, images=6,
+                   image_size=(2000, 1500)),
+}
+
+
+class StageTimer:
+    """stage_timer для process_document(): збирає час кожного етапу."""
+
+    def __init__(self):
+        self.seconds = {}
+
+    @contextlib.contextmanager
+    def __call__(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - started
+
+
+def _summary(samples):
+    return {"median": statistics.median(samples), "min": min(samples), "mean": statistics.fmean(samples),
+            "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0}
+
+
+def _max_rss_bytes():
+    """Пік RSS поточного процесу або None.
+
+    На Linux — VmHWM: ru_maxrss переживає exec() і містив би пік батьківського процесу.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    # ru_maxrss: байти на macOS, кілобайти на інших системах
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+def _rss_probe():
+    """Точка входу дочірнього процесу: argv = [шлях до .docx, JSON параметрів] → JSON з ru_maxrss."""
+    path, options = sys.argv[1], json.loads(sys.argv[2])
+    with open(path, "rb") as f:
+        data = f.read()
+    before = _max_rss_bytes()
+    process_document(data, **options)
+    print(json.dumps({"before": before, "peak": _max_rss_bytes()}))
+
+
+def measure_peak_rss(data, options):
+    """(пік RSS, приріст піку під час обробки) у свіжому процесі; (None, None), якщо RSS недоступний."""
+    fd, path = tempfile.mkstemp(suffix=".docx")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        result = subprocess.run([sys.executable, "-c", "from benchmarks.run import _rss_probe; _rss_probe()",
+                                 path, json.dumps(options)],
+                                cwd=Path(__file__).resolve().parent.parent, capture_output=True, text=True, check=True)
+    finally:
+        os.unlink(path)
+    rss = json.loads(result.stdout.strip().splitlines()[-1])
+    if rss["peak"] is None:
+        return None, None
+    return rss["peak"], rss["peak"] - rss["before"]
+
+
+def bench_scenario(name, repeat=5, warmup=1, text_format="xml", save_mode="passthrough", seed=0):
+    params = dict(SCENARIOS[name])
+    article_type = params.pop("article_type")
+    data = make_manuscript(seed=seed, **params)
+    options = dict(language="uk", article_type=article_type, text_format=text_format, save_mode=save_mode)
+
+    for _ in range(warmup):
+        process_document(data, **options)
+
+    stage_samples = {stage: [] for stage in STAGES}
+    totals = []
+    for _ in range(repeat):
+        timer = StageTimer()
+        started = time.perf_counter()
+        process_document(data, stage_timer=timer, **options)
+        totals.append(time.perf_counter() - started)
+        for stage in STAGES:
+            stage_samples[stage].append(timer.seconds.get(stage, 0.0))
+
+    # Пам'ять міряємо окремими прогонами: tracemalloc сповільнює виконання, а пік RSS
+    # процесу лише зростає, тому вимірюється у свіжому процесі
+    tracemalloc.start()
+    process_document(data, **options)
+    _, heap_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_peak, rss_growth = measure_peak_rss(data, options)
+
+    total = _summary(totals)
+    return {
+        "params": SCENARIOS[name],
+        "input_bytes": len(data),
+        "repeat": repeat,
+        "stages": {stage: _summary(samples) for stage, samples in stage_samples.items()},
+        "total": total,
+        "throughput": {
+            "docs_per_s": 1 / total["median"],
+            "mb_per_s": len(data) / 2**20 / total["median"],
+            "paragraphs_per_s": params.get("paragraphs", 0) / total["median"],
+        },
+        "peak_python_heap_bytes": heap_peak,
+        "peak_rss_bytes": rss_peak,
+        "rss_growth_bytes": rss_growth,
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"commit": commit, "pipeline_version": PIPELINE_VERSION, "python": platform.python_version(),
+            "python_docx": metadata.version("python-docx"), "platform": platform.platform(),
+            "machine": platform.machine()}
+
+
+def compare(current, baseline, threshold):
+    """Друкує відношення медіан (поточний / базовий); повертає кількість регресій."""
+    regressions = 0
+    for name, result in current["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        print(f"\n{name}")
+        rows = [(stage, result["stages"][stage]["median"], base["stages"].get(stage, {}).get("median"))
+                for stage in STAGES]
+        rows.append(("TOTAL", result["total"]["median"], base["total"]["median"]))
+        for stage, now, before in rows:
+            if not before:
+                continue
+            ratio = now / before
+            mark = " ⚠️" if ratio > threshold else ""
+            if mark and stage == "TOTAL":
+                regressions += 1
+            print(f"  {stage:16} {before * 1000:9.2f} ms → {now * 1000:9.2f} ms  ×{ratio:.2f}{mark}")
+        for label, field in (("python heap", "peak_python_heap_bytes"), ("rss growth", "rss_growth_bytes")):
+            if result.get(field) and base.get(field):
+                print(f"  {label:16} {base[field] / 2**20:9.1f} MB → {result[field] / 2**20:9.1f} MB  "
+                      f"×{result[field] / base[field]:.2f}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк конвеєра форматування")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="сценарій (можна кілька разів; за замовчуванням усі)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--text-format", choices=sorted(TEXT_FORMATTERS), default="xml")
+    parser.add_argument("--save-mode", choices=SAVE_MODES, default="passthrough")
+    parser.add_argument("-o", "--output", default="bench.json")
+    parser.add_argument("--compare", help="JSON попереднього прогону для порівняння")
+    parser.add_argument("--threshold", type=float, default=1.10,
+                        help="відношення медіан, вище якого загальний час вважається регресією")
+    args = parser.parse_args(argv)
+
+    results = {"environment": environment(),
+               "options": {"repeat": args.repeat, "seed": args.seed, "text_format": args.text_format,
+                           "save_mode": args.save_mode},
+               "scenarios": {}}
+    for name in args.scenario or list(SCENARIOS):
+        result = bench_scenario(name, args.repeat, args.warmup, args.text_format, args.save_mode, args.seed)
+        results["scenarios"][name] = result
+        print(f"{name:12} {result['total']['median'] * 1000:9.2f} ms  "
+              f"{result['throughput']['mb_per_s']:7.2f} MB/s  heap {result['peak_python_heap_bytes'] / 2**20:.1f} MB"
+              + (f"  RSS +{result['rss_growth_bytes'] / 2**20:.1f} MB" if result["rss_growth_bytes"] is not None else ""),
+              file=sys.stderr)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        return 1 if compare(results, baseline, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""Генератор синтетичних рукописів .docx з контрольованим розміром.
+
+Рукопис має ту саму структуру, яку очікує formatter.py: УДК, назва, автори,
+афіліації, анотація з ключовими словами, друга мовна версія, розділи
+основного тексту, список літератури, References і відомості про авторів.
+Однаковий seed дає той самий вміст документа.
+"""
+import io
+import random
+import struct
+import zlib
+
+from docx import Document
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.shared import Cm
+
+WORDS_UK = ("дослідження", "пацієнтів", "показники", "результати", "достовірно", "клітини", "тканини",
+            "морфологічні", "зміни", "group", "рівень", "вірогідно", "аналіз", "методи", "виявлено")
+WORDS_EN = ("study", "patients", "levels", "results", "significant", "cells", "tissue", "morphological",
+            "changes", "group", "increase", "analysis", "methods", "revealed", "compared")
+SURNAMES = ("Ivanenko", "Petrenko", "Smith", "Kowalski", "Müller")
+
+MAIN_HEADINGS = {
+    "uk": ["Вступ", "Мета роботи", "Матеріал і методи дослідження", "Результати та їх обговорення", "Висновки",
+           "Перспективи подальших досліджень"],
+    "en": ["Introduction", "Objective", "Materials and Methods", "Results and Discussion", "Conclusions",
+           "Prospects for further research"],
+}
+ABSTRACT_HEADINGS = {
+    "uk": ["Мета дослідження", "Матеріали і методи", "Результати", "Висновки"],
+    "en": ["Objective", "Materials and methods", "Results", "Conclusions"],
+}
+
+
+def synthetic_png(width, height, rng):
+    """PNG із шумом: погано стискається, як справжні мікрофотографії."""
+    raw = b"".join(b"\x00" + rng.randbytes(width * 3) for _ in range(height))
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw, 1)) + chunk(b"IEND", b""))
+
+
+def _sentence(rng, words, count):
+    return " ".join(rng.choice(words) for _ in range(count)).capitalize() + "."
+
+
+def _add_runs(paragraph, rng, words, runs):
+    for i in range(runs):
+        run = paragraph.add_run(_sentence(rng, words, rng.randint(4, 12)) + " ")
+        run.bold = i % 7 == 3
+
+
+def _add_abstract(doc, rng, language, abstract_chars):
+    words = WORDS_UK if language == "uk" else WORDS_EN
+    headings = ABSTRACT_HEADINGS[language]
+    per_heading = max(abstract_chars // len(headings), 1)
+    for heading in headings:
+        text = heading + ". "
+        while len(text) < per_heading:
+            text += _sentence(rng, words, 10) + " "
+        doc.add_paragraph(text[:per_heading])
+    doc.add_paragraph(("Ключові слова: " if language == "uk" else "Key words: ")
+                      + ", ".join(rng.sample(words, 5)))
+
+
+def _add_references(doc, rng, count):
+    for i in range(1, count + 1):
+        surname = rng.choice(SURNAMES)
+        doc.add_paragraph(f"{i}. {surname} J, Brown K. {_sentence(rng, WORDS_EN, 8)} "
+                          f"J Clin Pathol. {rng.randint(1995, 2024)};{rng.randint(1, 80)}({rng.randint(1, 12)}):"
+                          f"{rng.randint(1, 900)}-{rng.randint(901, 999)}.")
+
+
+def make_manuscript(paragraphs=100, runs_per_paragraph=4, references=30, bilingual=True, images=0,
+                    image_size=(800, 600), tables=0, language="uk", affiliations=2, abstract_chars=2000, seed=0):
+    """Повертає bytes синтетичного рукопису.
+
+    paragraphs — абзаців основного тексту (поділені між розділами),
+    runs_per_paragraph — фрагментів (w:r) в абзаці, references — джерел у
+    кожному зі списків, images — кількість зображень image_size пікселів,
+    tables — таблиць 5×4.
+    """
+    rng = random.Random(seed)
+    second = "en" if language == "uk" else "uk"
+    doc = Document()
+
+    doc.add_paragraph("УДК 616-091")
+    for lang in ([language, second] if bilingual else [language]):
+        words = WORDS_UK if lang == "uk" else WORDS_EN
+        if lang != language:
+            doc.add_paragraph("")
+        doc.add_paragraph(_sentence(rng, words, 10))
+        authors = ", ".join(f"{SURNAMES[(n - 1) % len(SURNAMES)]} I.I.{n}" for n in range(1, affiliations + 1))
+        doc.add_paragraph(authors)
+        for n in range(1, affiliations + 1):
+            doc.add_paragraph(f"{n} Bukovinian State Medical University, Chernivtsi, Ukraine")
+        _add_abstract(doc, rng, lang, abstract_chars)
+
+    headings = MAIN_HEADINGS[language]
+    words = WORDS_UK if language == "uk" else WORDS_EN
+    per_section = max(paragraphs // len(headings), 1)
+    figures_left, tables_left = images, tables
+    for heading in headings:
+        doc.add_paragraph(heading)
+        for i in range(per_section):
+            p = doc.add_paragraph()
+            p.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY if i % 3 else WD_ALIGN_PARAGRAPH.LEFT
+            _add_runs(p, rng, words, runs_per_paragraph)
+            if references:
+                p.add_run(f" [{rng.randint(1, references)}]")
+        if figures_left:
+            doc.add_picture(io.BytesIO(synthetic_png(*image_size, rng)), width=Cm(12))
+            figures_left -= 1
+        if tables_left:
+            table = doc.add_table(rows=5, cols=4)
+            for cell in table._cells:
+                cell.text = str(rng.randint(1, 100))
+            tables_left -= 1
+    for _ in range(figures_left):
+        doc.add_picture(io.BytesIO(synthetic_png(*image_size, rng)), width=Cm(12))
+
+    doc.add_paragraph("Список літератури" if language == "uk" else "References")
+    _add_references(doc, rng, references)
+    if language == "uk":
+        doc.add_paragraph("References")
+        _add_references(doc, rng, references)
+        doc.add_paragraph("Відомості про авторів")
+    else:
+        doc.add_paragraph("Information about authors")
+
+    bio = io.BytesIO()
+    doc.save(bio)
+    return bio.getvalue()
@@ -0,0 +1,187 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from formatter import PIPELINE_VERSION, check_document, format_document
+from profiles import DEFAULT_JOURNAL
+
+# ============================================================
+# КЕШ РЕЗУЛЬТАТІВ ЗА ВМІСТОМ ФАЙЛУ
+# ============================================================
+# Ключ = sha256(байти .docx + версія конвеєра). Зберігається результат
+# format_document() — він не залежить від мови й типу статті; перевірки
+# check_document() виконуються поверх збережених текстів абзаців і займають
+# мілісекунди. Повторне натискання кнопки, повторне завантаження того самого
+# рукопису чи зміна параметрів не запускають обробку .docx знову.
+
+HASH_CHUNK = 1024 * 1024
+
+
+def make_key(source, *options):
+    """Ключ кешу для bytes або двійкового file-like (читається шматками)."""
+    digest = hashlib.sha256()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        digest.update(source)
+    else:
+        source.seek(0)
+        for chunk in iter(lambda: source.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+        source.seek(0)
+    digest.update("\0".join(("", PIPELINE_VERSION) + options).encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """LRU-кеш (виправлений .docx, звіт, тексти абзаців) з бюджетом пам'яті в байтах.
+
+    disk_dir вмикає другий рівень на диску: записи, витіснені з пам'яті або
+    збережені іншим процесом, читаються звідти. disk_max_bytes обмежує його
+    розмір (найстаріші за часом доступу файли видаляються).
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, disk_dir=None, disk_max_bytes=None):
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        self.hits = self.misses = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def size(self):
+        return self._size
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        entry = self._disk_get(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._memory_put(key, entry)
+        return entry
+
+    def put(self, key, fixed, report, texts):
+        entry = (bytes(fixed), list(report), list(texts))
+        with self._lock:
+            self._memory_put(key, entry)
+        self._disk_put(key, entry)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    @staticmethod
+    def _entry_size(entry):
+        fixed, report, texts = entry
+        return len(fixed) + sum(len(line) for line in report) + sum(len(text) for text in texts)
+
+    def _memory_put(self, key, entry):
+        entry_size = self._entry_size(entry)
+        if entry_size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._size -= self._entry_size(old)
+        self._entries[key] = entry
+        self._size += entry_size
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= self._entry_size(evicted)
+
+    def _disk_paths(self, key):
+        return self.disk_dir / f"{key}.docx", self.disk_dir / f"{key}.json"
+
+    def _disk_get(self, key):
+        if not self.disk_dir:
+            return None
+        docx_path, report_path = self._disk_paths(key)
+        try:
+            meta = json.loads(report_path.read_text(encoding="utf-8"))
+            fixed = docx_path.read_bytes()
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(docx_path)
+        except OSError:
+            pass        # інший процес щойно витіснив запис; прочитане лишається дійсним
+        return fixed, meta["report"], meta["texts"]
+
+    def _disk_put(self, key, entry):
+        if not self.disk_dir:
+            return
+        docx_path, report_path = self._disk_paths(key)
+        # Атомарний запис: кешем можуть одночасно користуватися кілька процесів
+        for path, payload in ((docx_path, entry[0]),
+                              (report_path, json.dumps({"report": entry[1], "texts": entry[2]},
+                                                       ensure_ascii=False).encode("utf-8"))):
+            fd, tmp = tempfile.mkstemp(dir=self.disk_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp, path)
+        if self.disk_max_bytes is not None:
+            self._disk_evict()
+
+    def _disk_evict(self):
+        files = []
+        for path in self.disk_dir.glob("*.docx"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue        # уже видалений іншим процесом
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort(key=lambda item: item[0])
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.disk_max_bytes:
+                break
+            total -= size
+            path.unlink(missing_ok=True)
+            path.with_suffix(".json").unlink(missing_ok=True)
+
+
+def cache_lookup(cache, key, file_name="document.docx"):
+    """(bytes, звіт, тексти) з кешу або None."""
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    fixed, report, texts = entry
+    # Ім'я файлу не входить у ключ, тому перший рядок звіту оновлюємо
+    return fixed, ["Файл завантажено: " + file_name] + report[1:], texts
+
+
+def format_document_cached(cache, source, file_name="document.docx", **kwargs):
+    """format_document() через кеш. Повертає (bytes, звіт, тексти, чи було влучання)."""
+    key = make_key(source)
+    entry = cache_lookup(cache, key, file_name)
+    if entry is not None:
+        return (*entry, True)
+
+    fixed, report, texts = format_document(source, file_name=file_name, **kwargs)
+    cache.put(key, fixed, report, texts)
+    return fixed, report, texts, False
+
+
+def process_document_cached(cache, source, language="uk", article_type="original", file_name="document.docx",
+                            journal=DEFAULT_JOURNAL, stage_timer=None, **kwargs):
+    """process_document() через кеш. Повертає (bytes, звіт, чи було влучання)."""
+    fixed, report, texts, hit = format_document_cached(cache, source, file_name, stage_timer=stage_timer, **kwargs)
+    report = report + check_document(texts, language, article_type, journal, stage_timer)
+    return fixed, report, hit
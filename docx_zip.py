@@ -0,0 +1,82 @@
+import shutil
+import zipfile
+
+# ============================================================
+# ЗБЕРЕЖЕННЯ .docx БЕЗ ПОВНОЇ ПЕРЕСЕРІАЛІЗАЦІЇ ПАКЕТА
+# ============================================================
+# doc.save() заново серіалізує кожну частину пакета, зокрема всі зображення.
+# Форматування змінює лише word/document.xml, тому решту записів (media,
+# fonts, embeddings, стилі) переносимо з оригінального архіву потоково,
+# шматками, не тримаючи їх ще раз у пам'яті.
+
+COPY_CHUNK = 1024 * 1024
+
+# Уже стиснені формати: повторне deflate-стиснення лише витрачає CPU
+PRECOMPRESSED_EXTENSIONS = (".jpeg", ".jpg", ".png", ".gif", ".wdp", ".jxr", ".mp4", ".mov", ".wmv",
+                            ".zip", ".docx", ".xlsx", ".pptx")
+
+
+def _entry_info(info, compress_type):
+    new_info = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+    new_info.compress_type = compress_type
+    new_info.external_attr = info.external_attr
+    return new_info
+
+
+def save_passthrough(doc, source, dest, changed_parts=None):
+    """Записує doc у dest, перевикористовуючи незмінені записи архіву source.
+
+    source — оригінальний .docx (шлях або file-like з seek), dest — шлях або
+    file-like для запису. changed_parts — частини пакета, які треба
+    серіалізувати заново (за замовчуванням лише основна частина документа).
+    Якщо якоїсь частини немає в архіві під тим самим ім'ям, виконується
+    звичайний doc.save(dest).
+    """
+    if changed_parts is None:
+        changed_parts = [doc.part]
+    replaced = {str(part.partname).lstrip("/"): part for part in changed_parts}
+
+    if hasattr(source, "seek"):
+        source.seek(0)
+    with zipfile.ZipFile(source) as zin:
+        if not replaced.keys() <= set(zin.namelist()):
+            doc.save(dest)
+            return
+
+        with zipfile.ZipFile(dest, "w", zipfile.ZIP_DEFLATED) as zout:
+            for info in zin.infolist():
+                part = replaced.get(info.filename)
+                if part is not None:
+                    zout.writestr(_entry_info(info, zipfile.ZIP_DEFLATED), part.blob)
+                    continue
+
+                compress_type = info.compress_type
+                if info.filename.lower().endswith(PRECOMPRESSED_EXTENSIONS):
+                    compress_type = zipfile.ZIP_STORED
+                with zin.open(info) as src, zout.open(_entry_info(info, compress_type), "w", force_zip64=info.file_size > zipfile.ZIP64_LIMIT) as dst:
+                    shutil.copyfileobj(src, dst, COPY_CHUNK)
+
+
+def write_results_zip(dest, files, extras=()):
+    """ZIP-архів з виправленими .docx і звітами для пакетного завантаження.
+
+    files — [(ім'я, bytes)] виправлених файлів (зберігаються без повторного
+    стиснення: .docx уже є ZIP), extras — [(ім'я, bytes або str)] звітів.
+    Однакові імена отримують числовий префікс.
+    """
+    used = set()
+
+    def unique(name):
+        candidate, n = name, 1
+        while candidate in used:
+            n += 1
+            candidate = f"{n}_{name}"
+        used.add(candidate)
+        return candidate
+
+    with zipfile.ZipFile(dest, "w", zipfile.ZIP_DEFLATED) as zout:
+        for name, data in files:
+            zout.writestr(unique(name), data, compress_type=zipfile.ZIP_STORED)
+        for name, data in extras:
+            zout.writestr(unique(name), data)
+    return dest
@@ -0,0 +1,237 @@
+"""Обробка рукописів з папки Google Drive.
+
+Нові .docx з папки завантажуються паралельно (пул HTTP-з'єднань), проходять
+через formatter у пулі процесів, а виправлені файли та звіти вивантажуються
+назад. Стан (які файли вже оброблено) зберігається у JSON, тож перерваний
+запуск продовжується з того місця, де зупинився.
+
+Приклад:
+    python drive_sync.py FOLDER_ID --output-folder OUT_FOLDER_ID --credentials service_account.json
+
+Бібліотеки Google імпортуються лише тут і лише для справжнього Drive;
+з --api-url http://127.0.0.1:8765 --no-auth можна працювати з локальним
+фейковим сервером (fake_drive.py).
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from formatter import ARTICLE_TYPES, DOCX_MIME, LANGUAGES, process_document
+
+DRIVE_API_URL = "https://www.googleapis.com"
+DRIVE_SCOPES = ["https://www.googleapis.com/auth/drive"]
+FIXED_PREFIX = "fixed_"
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+def make_session(credentials_file=None, pool_size=8, authorized=True):
+    """requests-сесія з пулом з'єднань; з авторизацією Google, якщо authorized."""
+    if authorized:
+        # Лінивий імпорт: google-auth потрібен лише в режимі Drive
+        import google.auth
+        from google.auth.transport.requests import AuthorizedSession
+        if credentials_file:
+            from google.oauth2 import service_account
+            credentials = service_account.Credentials.from_service_account_file(credentials_file, scopes=DRIVE_SCOPES)
+        else:
+            credentials, _ = google.auth.default(scopes=DRIVE_SCOPES)
+        session = AuthorizedSession(credentials)
+    else:
+        session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class DriveClient:
+    """Мінімальний клієнт Drive API v3: список, завантаження, вивантаження."""
+
+    def __init__(self, session, api_url=DRIVE_API_URL, retries=5, backoff=0.5, timeout=120):
+        self.session = session
+        self.api_url = api_url.rstrip("/")
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+    def _request(self, method, url, **kwargs):
+        """Запит із повторами та експоненційною затримкою (з урахуванням Retry-After)."""
+        kwargs.setdefault("timeout", self.timeout)
+        body = kwargs.get("data")
+        for attempt in range(self.retries + 1):
+            if hasattr(body, "seek"):
+                body.seek(0)        # файл-тіло повтору надсилається з початку
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    response.raise_for_status()
+                    return response
+                # Інакше з'єднання (зокрема stream=True) не повернеться в пул
+                response.close()
+                retry_after = response.headers.get("Retry-After")
+                if retry_after and retry_after.isdigit():
+                    time.sleep(int(retry_after))
+                    continue
+            time.sleep(self.backoff * 2 ** attempt * (1 + random.random()))
+
+    def list_docx(self, folder_id):
+        files, page_token = [], None
+        while True:
+            params = {"q": f"'{folder_id}' in parents and trashed = false and mimeType = '{DOCX_MIME}'",
+                      "fields": "nextPageToken, files(id, name, md5Checksum, modifiedTime, size)",
+                      "pageSize": 1000}
+            if page_token:
+                params["pageToken"] = page_token
+            data = self._request("GET", f"{self.api_url}/drive/v3/files", params=params).json()
+            files.extend(data.get("files", []))
+            page_token = data.get("nextPageToken")
+            if not page_token:
+                return files
+
+    def download(self, file_id, dest):
+        """Потоково записує вміст файлу в dest (file-like)."""
+        response = self._request("GET", f"{self.api_url}/drive/v3/files/{file_id}", params={"alt": "media"},
+                                 stream=True)
+        with response:
+            for chunk in response.iter_content(1024 * 1024):
+                dest.write(chunk)
+
+    def upload(self, name, data, mime_type, folder_id):
+        """Resumable upload: спершу метадані, потім вміст одним PUT. Повертає id файлу.
+
+        data — bytes або двійковий файл (надсилається потоково).
+        """
+        size = len(data) if isinstance(data, (bytes, bytearray)) else os.fstat(data.fileno()).st_size
+        start = self._request("POST", f"{self.api_url}/upload/drive/v3/files",
+                              params={"uploadType": "resumable", "fields": "id"},
+                              json={"name": name, "parents": [folder_id], "mimeType": mime_type},
+                              headers={"X-Upload-Content-Type": mime_type, "X-Upload-Content-Length": str(size)})
+        upload_url = start.headers["Location"]
+        response = self._request("PUT", upload_url, data=data, headers={"Content-Type": mime_type})
+        return response.json()["id"]
+
+
+class SyncState:
+    """JSON-стан синхронізації: id файлу → версія та результат обробки."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.files = json.loads(self.path.read_text(encoding="utf-8")) if self.path.exists() else {}
+
+    @staticmethod
+    def version(item):
+        return item.get("md5Checksum") or item.get("modifiedTime")
+
+    def is_done(self, item):
+        entry = self.files.get(item["id"])
+        return bool(entry) and entry.get("status") == "done" and entry.get("version") == self.version(item)
+
+    def uploaded(self, item):
+        """{"fixed_id", "report"}, якщо виправлений файл цієї версії вже вивантажено, інакше {}."""
+        entry = self.files.get(item["id"])
+        if entry and entry.get("version") == self.version(item) and entry.get("fixed_id") and "report" in entry:
+            return {"fixed_id": entry["fixed_id"], "report": entry["report"]}
+        return {}
+
+    def record(self, item, **fields):
+        with self._lock:
+            self.files[item["id"]] = {"name": item["name"], "version": self.version(item), **fields}
+            fd, tmp = tempfile.mkstemp(dir=self.path.parent or ".", suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.files, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, self.path)
+
+
+def _format(source_path, fixed_path, language, article_type, file_name):
+    """Форматує файл з диска у файл на диску (у процесі пулу); повертає звіт."""
+    with open(source_path, "rb") as source, open(fixed_path, "wb") as out:
+        return process_document(source, language, article_type, file_name=file_name, out=out)[1]
+
+
+def sync_folder(client, folder_id, output_folder_id=None, language="uk", article_type="original", state=None,
+                concurrency=4, process_pool=None, log=print):
+    """Обробляє нові/змінені .docx з folder_id. Повертає список результатів."""
+    output_folder_id = output_folder_id or folder_id
+    items = [item for item in client.list_docx(folder_id)
+             if not item["name"].startswith(FIXED_PREFIX) and not (state and state.is_done(item))]
+    log(f"Нових файлів: {len(items)}")
+
+    def handle(item):
+        # Виправлений файл, вивантажений попереднім запуском, не вивантажується вдруге
+        uploaded = state.uploaded(item) if state is not None else {}
+        try:
+            if not uploaded:
+                # Вхідний і виправлений файли — на диску, у пам'яті їх не тримаємо
+                with tempfile.TemporaryDirectory() as tmp:
+                    source_path, fixed_path = Path(tmp) / "source.docx", Path(tmp) / "fixed.docx"
+                    with open(source_path, "wb") as f:
+                        client.download(item["id"], f)
+                    args = (source_path, fixed_path, language, article_type, item["name"])
+                    report = process_pool.submit(_format, *args).result() if process_pool is not None else _format(*args)
+                    with open(fixed_path, "rb") as f:
+                        uploaded = {"fixed_id": client.upload(FIXED_PREFIX + item["name"], f, DOCX_MIME,
+                                                              output_folder_id),
+                                    "report": report}
+                if state is not None:
+                    state.record(item, status="uploading", **uploaded)
+            report_id = client.upload(Path(item["name"]).stem + "_report.json",
+                                      json.dumps(uploaded["report"], ensure_ascii=False, indent=2).encode("utf-8"),
+                                      "application/json", output_folder_id)
+            result = {"status": "done", "fixed_id": uploaded["fixed_id"], "report_id": report_id}
+            if state is not None:
+                state.record(item, **result)
+        except Exception as exc:
+            result = {"status": "error", "error": f"{type(exc).__name__}: {exc}"}
+            if state is not None:
+                state.record(item, **result, **uploaded)
+        log(f"[{result['status']}] {item['name']}")
+        return {"id": item["id"], "name": item["name"], **result}
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return [future.result() for future in as_completed([pool.submit(handle, item) for item in items])]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Форматування рукописів з папки Google Drive")
+    parser.add_argument("folder_id", help="id папки з рукописами")
+    parser.add_argument("--output-folder", help="id папки для виправлених файлів (за замовчуванням та сама)")
+    parser.add_argument("--language", choices=LANGUAGES, default="uk")
+    parser.add_argument("--article-type", choices=ARTICLE_TYPES, default="original")
+    parser.add_argument("--concurrency", type=int, default=4, help="одночасних передавань файлів")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="процесів форматування (за замовчуванням: усі ядра)")
+    parser.add_argument("--state", default="drive_state.json", help="файл стану для продовження перерваного запуску")
+    parser.add_argument("--credentials", help="JSON сервісного акаунта (інакше — облікові дані за замовчуванням)")
+    parser.add_argument("--api-url", default=DRIVE_API_URL, help="адреса Drive API (для локального фейкового сервера)")
+    parser.add_argument("--no-auth", action="store_true", help="без авторизації Google (лише для фейкового сервера)")
+    parser.add_argument("--retries", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    session = make_session(args.credentials, pool_size=args.concurrency, authorized=not args.no_auth)
+    client = DriveClient(session, api_url=args.api_url, retries=args.retries)
+    state = SyncState(args.state)
+    log = lambda message: print(message, file=sys.stderr)
+    with ProcessPoolExecutor(max_workers=args.workers) as process_pool:
+        results = sync_folder(client, args.folder_id, args.output_folder, args.language, args.article_type, state,
+                              args.concurrency, process_pool, log)
+    failed = sum(1 for r in results if r["status"] != "done")
+    log(f"Оброблено {len(results)} файлів, помилок: {failed}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
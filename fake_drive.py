@@ -0,0 +1,144 @@
+"""Локальний фейковий сервер Drive API v3 для перевірки drive_sync.py.
+
+Підтримує рівно те, що використовує DriveClient: список файлів папки,
+завантаження (alt=media) і resumable upload. --fail-rate повертає випадкові
+503, щоб перевірити повтори.
+
+Приклад:
+    python fake_drive.py --folder inbox=./submissions --port 8765
+    python drive_sync.py inbox --output-folder out --api-url http://127.0.0.1:8765 --no-auth
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import random
+import re
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from formatter import DOCX_MIME
+
+
+class FakeDrive:
+    def __init__(self, fail_rate=0.0):
+        self.files = {}
+        self.sessions = {}
+        self.fail_rate = fail_rate
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def add(self, name, data, mime_type, folder_id):
+        with self._lock:
+            file_id = f"f{next(self._ids)}"
+            self.files[file_id] = {"id": file_id, "name": name, "mimeType": mime_type, "parents": [folder_id],
+                                   "md5Checksum": hashlib.md5(data).hexdigest(), "size": str(len(data)),
+                                   "modifiedTime": datetime.now(timezone.utc).isoformat(), "data": data}
+            return file_id
+
+
+def make_handler(drive):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body=b"", content_type="application/json", headers=None):
+            if isinstance(body, (dict, list)):
+                body = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _body(self):
+            return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        def _flaky(self):
+            if random.random() < drive.fail_rate:
+                self._body()
+                self._send(503, {"error": "backendError"})
+                return True
+            return False
+
+        def do_GET(self):
+            if self._flaky():
+                return
+            url = urlparse(self.path)
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            if url.path == "/drive/v3/files":
+                match = re.search(r"'([^']+)' in parents", query.get("q", ""))
+                folder = match.group(1) if match else None
+                items = [{k: v for k, v in f.items() if k != "data"} for f in drive.files.values()
+                         if folder in f["parents"] and f["mimeType"] == DOCX_MIME]
+                offset, size = int(query.get("pageToken", 0)), int(query.get("pageSize", 100))
+                page = {"files": items[offset:offset + size]}
+                if offset + size < len(items):
+                    page["nextPageToken"] = str(offset + size)
+                return self._send(200, page)
+            match = re.fullmatch(r"/drive/v3/files/([^/]+)", url.path)
+            if match and match.group(1) in drive.files and query.get("alt") == "media":
+                item = drive.files[match.group(1)]
+                return self._send(200, item["data"], item["mimeType"])
+            self._send(404, {"error": "notFound"})
+
+        def do_POST(self):
+            if self._flaky():
+                return
+            if urlparse(self.path).path == "/upload/drive/v3/files":
+                metadata = json.loads(self._body() or b"{}")
+                session_id = f"s{next(drive._ids)}"
+                drive.sessions[session_id] = metadata
+                host = self.headers.get("Host")
+                return self._send(200, {}, headers={"Location": f"http://{host}/upload/sessions/{session_id}"})
+            self._send(404, {"error": "notFound"})
+
+        def do_PUT(self):
+            if self._flaky():
+                return
+            match = re.fullmatch(r"/upload/sessions/([^/]+)", urlparse(self.path).path)
+            if match and match.group(1) in drive.sessions:
+                metadata = drive.sessions.pop(match.group(1))
+                file_id = drive.add(metadata["name"], self._body(), metadata.get("mimeType", "application/octet-stream"),
+                                    metadata["parents"][0])
+                return self._send(200, {"id": file_id})
+            self._send(404, {"error": "notFound"})
+
+    return Handler
+
+
+def serve(drive, host="127.0.0.1", port=8765):
+    """Запускає сервер у фоновому потоці; повертає ThreadingHTTPServer."""
+    server = ThreadingHTTPServer((host, port), make_handler(drive))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Фейковий Drive API для локальної перевірки")
+    parser.add_argument("--folder", action="append", default=[], metavar="ID=DIR",
+                        help="папка з id ID, заповнена .docx з локального каталогу DIR")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="частка запитів, що отримують 503")
+    args = parser.parse_args(argv)
+
+    drive = FakeDrive(args.fail_rate)
+    for spec in args.folder:
+        folder_id, directory = spec.split("=", 1)
+        for path in sorted(Path(directory).glob("*.docx")):
+            drive.add(path.name, path.read_bytes(), DOCX_MIME, folder_id)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(drive))
+    print(f"Fake Drive: http://{args.host}:{args.port} ({len(drive.files)} файлів)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
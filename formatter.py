@@ -0,0 +1,475 @@
+import contextlib
+import io
+import warnings
+
+from docx import Document
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.shared import Pt, Cm, Emu, Twips
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+
+from docx_zip import save_passthrough
+from profiles import DEFAULT_JOURNAL, get_profile
+from references import analyze_references
+from segments import SectionMap, segment_document
+
+warnings.filterwarnings("ignore")
+
+# ============================================================
+# КОНВЕЄР ФОРМАТУВАННЯ СТАТТІ (без залежності від Streamlit)
+# ============================================================
+
+LANGUAGES = ("uk", "en")
+ARTICLE_TYPES = ("original", "case", "review")
+
+# Збільшуйте при зміні правил форматування: від версії залежать ключі кешу результатів
+PIPELINE_VERSION = "1"
+
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+# Підставляється, якщо перший абзац не починається з «УДК»
+UDC_PLACEHOLDER = "УДК 000.00"
+
+
+def format_authors(text):
+    """Ініціали перед прізвищем, цифри афіліацій зберігаються."""
+    new_authors = []
+    for author in text.split(','):
+        author = author.strip()
+        parts = author.split()
+        if len(parts) >= 2:
+            if parts[0].endswith("."):
+                initials, surname = parts[0], parts[1]
+            else:
+                surname, initials = parts[0], parts[1]
+            rest = " ".join(parts[2:])
+            author_text = f"{initials} {surname}"
+            if rest: author_text += f" {rest}"
+            new_authors.append(author_text)
+        else:
+            new_authors.append(author)
+    return ", ".join(new_authors)
+
+
+def format_title(text):
+    """Назва статті: один абзац, великими літерами."""
+    return text.replace("\n", " ").strip().upper()
+
+
+def italicize_abstract(abstract_paragraphs):
+    for para in abstract_paragraphs:
+        para.paragraph_format.first_line_indent = None
+        for run in para.runs:
+            current_bold = run.font.bold
+            run.font.italic = True
+            if current_bold is not None: run.font.bold = current_bold
+
+
+# 2.3 Перевірка та виправлення полів сторінки
+def fix_margins(doc, report):
+    section = doc.sections[0]
+    if section.top_margin != Cm(2):
+        section.top_margin = Cm(2)
+        report.append("Виправлено верхнє поле на 2 см")
+    if section.bottom_margin != Cm(2):
+        section.bottom_margin = Cm(2)
+        report.append("Виправлено нижнє поле на 2 см")
+    if section.right_margin != Cm(2):
+        section.right_margin = Cm(2)
+        report.append("Виправлено праве поле на 2 см")
+    if section.left_margin != Cm(2):
+        section.left_margin = Cm(2)
+        report.append("Виправлено ліве поле на 2 см")
+
+
+# 2.4 Перевірка та виправлення формату тексту
+def fix_text_format(doc, report):
+    for paragraph in doc.paragraphs:
+        paragraph_format = paragraph.paragraph_format
+        paragraph_format.line_spacing = 1.5
+        paragraph_format.space_before = Pt(0)
+        paragraph_format.space_after = Pt(0)
+        if paragraph.alignment == WD_ALIGN_PARAGRAPH.JUSTIFY:
+            paragraph_format.first_line_indent = Cm(1.25)
+        for run in paragraph.runs:
+            run.font.name = "Times New Roman"
+            run.font.size = Pt(14)
+    report.append("Перевірено та виправлено формат тексту")
+
+
+# Значення, які python-docx записує для правил 2.4 (1.5 інтервалу, 0 пт, 1.25 см, Times New Roman 14)
+_W_LINE, _W_LINE_RULE = qn("w:line"), qn("w:lineRule")
+_W_BEFORE, _W_AFTER = qn("w:before"), qn("w:after")
+_W_FIRST_LINE, _W_HANGING = qn("w:firstLine"), qn("w:hanging")
+_W_ASCII, _W_HANSI, _W_VAL = qn("w:ascii"), qn("w:hAnsi"), qn("w:val")
+_LINE_1_5 = str(int(Emu(1.5 * Twips(240)).twips))
+_ZERO_PT = str(Pt(0).twips)
+_FIRST_LINE_1_25 = str(Cm(1.25).twips)
+_SIZE_14 = str(int(Pt(14).pt * 2))
+
+
+# Послідовності дочірніх елементів w:pPr і w:rPr за схемою OOXML (як у python-docx),
+# потрібні, щоб вставляти нові елементи на те саме місце, що й python-docx
+_PPR_SEQUENCE = (
+    "w:pStyle", "w:keepNext", "w:keepLines", "w:pageBreakBefore", "w:framePr", "w:widowControl",
+    "w:numPr", "w:suppressLineNumbers", "w:pBdr", "w:shd", "w:tabs", "w:suppressAutoHyphens",
+    "w:kinsoku", "w:wordWrap", "w:overflowPunct", "w:topLinePunct", "w:autoSpaceDE", "w:autoSpaceDN",
+    "w:bidi", "w:adjustRightInd", "w:snapToGrid", "w:spacing", "w:ind", "w:contextualSpacing",
+    "w:mirrorIndents", "w:suppressOverlap", "w:jc", "w:textDirection", "w:textAlignment",
+    "w:textboxTightWrap", "w:outlineLvl", "w:divId", "w:cnfStyle", "w:rPr", "w:sectPr", "w:pPrChange",
+)
+_RPR_SEQUENCE = (
+    "w:rStyle", "w:rFonts", "w:b", "w:bCs", "w:i", "w:iCs", "w:caps", "w:smallCaps", "w:strike",
+    "w:dstrike", "w:outline", "w:shadow", "w:emboss", "w:imprint", "w:noProof", "w:snapToGrid",
+    "w:vanish", "w:webHidden", "w:color", "w:spacing", "w:w", "w:kern", "w:position", "w:sz",
+    "w:szCs", "w:highlight", "w:u", "w:effect", "w:bdr", "w:shd", "w:fitText", "w:vertAlign",
+    "w:rtl", "w:cs", "w:em", "w:lang", "w:eastAsianLayout", "w:specVanish", "w:oMath",
+)
+
+
+def _successor_ranks(sequence, nsptag):
+    """{тег наступника: позиція у схемі} для елемента nsptag."""
+    successors = sequence[sequence.index(nsptag) + 1:]
+    return {qn(tag): rank for rank, tag in enumerate(successors)}
+
+
+_SPACING_NEXT = _successor_ranks(_PPR_SEQUENCE, "w:spacing")
+_IND_NEXT = _successor_ranks(_PPR_SEQUENCE, "w:ind")
+_RFONTS_NEXT = _successor_ranks(_RPR_SEQUENCE, "w:rFonts")
+_SZ_NEXT = _successor_ranks(_RPR_SEQUENCE, "w:sz")
+
+
+def _get_or_insert(parent, nsptag, successor_ranks):
+    """Аналог get_or_add_*() з python-docx за один прохід по дочірніх елементах.
+
+    Новий елемент стає перед першим за схемою наявним наступником — так само,
+    як python-docx, тож результат збігається навіть для «неправильно»
+    впорядкованого XML.
+    """
+    tag = qn(nsptag)
+    successor, best_rank = None, len(successor_ranks)
+    for child in parent:
+        child_tag = child.tag
+        if child_tag == tag:
+            return child
+        rank = successor_ranks.get(child_tag, best_rank)
+        if rank < best_rank:
+            successor, best_rank = child, rank
+    element = OxmlElement(nsptag)
+    if successor is not None:
+        successor.addprevious(element)
+    else:
+        parent.append(element)
+    return element
+
+
+# 2.4 (швидкий режим) ті самі правила, але одразу над XML: w:p/w:r без проксі-об'єктів python-docx
+def fix_text_format_xml(doc, report):
+    W_P, W_R, W_PPR, W_RPR, W_JC = qn("w:p"), qn("w:r"), qn("w:pPr"), qn("w:rPr"), qn("w:jc")
+
+    for p in doc.element.body.iterchildren(W_P):
+        pPr = p.find(W_PPR)
+        if pPr is None: pPr = p.get_or_add_pPr()
+        spacing = _get_or_insert(pPr, "w:spacing", _SPACING_NEXT)
+        spacing.set(_W_LINE, _LINE_1_5)
+        spacing.set(_W_LINE_RULE, "auto")
+        spacing.set(_W_BEFORE, _ZERO_PT)
+        spacing.set(_W_AFTER, _ZERO_PT)
+        jc = pPr.find(W_JC)
+        if jc is not None and jc.val == WD_ALIGN_PARAGRAPH.JUSTIFY:
+            ind = _get_or_insert(pPr, "w:ind", _IND_NEXT)
+            ind.attrib.pop(_W_FIRST_LINE, None)
+            ind.attrib.pop(_W_HANGING, None)
+            ind.set(_W_FIRST_LINE, _FIRST_LINE_1_25)
+        for r in p.iterchildren(W_R):
+            rPr = r.find(W_RPR)
+            if rPr is None: rPr = r.get_or_add_rPr()
+            rFonts = _get_or_insert(rPr, "w:rFonts", _RFONTS_NEXT)
+            rFonts.set(_W_ASCII, "Times New Roman")
+            rFonts.set(_W_HANSI, "Times New Roman")
+            _get_or_insert(rPr, "w:sz", _SZ_NEXT).set(_W_VAL, _SIZE_14)
+    report.append("Перевірено та виправлено формат тексту")
+
+
+TEXT_FORMATTERS = {"xml": fix_text_format_xml, "docx": fix_text_format}
+SAVE_MODES = ("passthrough", "docx")
+
+# Етапи конвеєра (назви для stage_timer): спершу format_document(), потім check_document()
+STAGES = ("load", "margins", "text_format", "segment", "header", "second_language", "save", "structure", "references")
+CHECK_STAGES = ("structure", "references")
+STAGE_LABELS = {
+    "load": "Завантаження файлу",
+    "margins": "2.3 Поля сторінки",
+    "text_format": "2.4 Формат тексту",
+    "segment": "Сегментація статті",
+    "header": "2.5 УДК, назва, автори, анотація",
+    "second_language": "2.X Друга мовна версія",
+    "structure": "3. Структурні елементи",
+    "references": "Перевірка літератури",
+    "save": "2.6 Збереження",
+}
+
+
+def no_timer(name):
+    """stage_timer за замовчуванням: етапи без вимірювань."""
+    return contextlib.nullcontext()
+
+
+def _set_text(paragraphs, sections, index, text):
+    """Змінює текст абзацу й оновлює знімок у SectionMap."""
+    paragraphs[index].text = text
+    sections.set_text(index, paragraphs[index].text)
+
+
+# 2.5 УДК, назва, автори, афіліація та анотація (межі розділів — із SectionMap)
+def fix_header_block(paragraphs, sections, report):
+    texts = sections.texts
+
+    # ---- УДК ----
+    if "udc" in sections:
+        first = paragraphs[0]
+        if not texts[0].startswith("УДК"):
+            _set_text(paragraphs, sections, 0, UDC_PLACEHOLDER)
+            report.append("Додано УДК")
+        for run in first.runs:
+            run.font.bold = True
+        report.append("УДК перевірено/виправлено")
+
+    # ---- Назва статті ----
+    if "title" in sections:
+        title_para = paragraphs[1]
+        _set_text(paragraphs, sections, 1, format_title(texts[1]))
+        for run in title_para.runs:
+            run.font.bold = True
+        report.append("Назва статті перевірена та приведена до формату (великими літерами, один абзац, жирний)")
+
+        # ---- Автори ----
+        if "authors" in sections:
+            authors_para = paragraphs[2]
+            _set_text(paragraphs, sections, 2, format_authors(texts[2]))
+            for run in authors_para.runs:
+                run.font.bold = True
+                run.font.italic = True
+            report.append("Автори перевірені та відформатовані (жирний + курсив, ініціали перед прізвищем, цифри афіліацій збережені)")
+
+    # Афіліація (кількість рядків — за цифрами афіліацій у рядку авторів)
+    affiliation_start, affiliation_end = sections.span("affiliations")
+    for para in paragraphs[affiliation_start:affiliation_end]:
+        for run in para.runs:
+            run.font.bold = False
+            run.font.italic = False
+    report.append(f"Афіліація авторів перевірена ({sections.affiliation_count} рядків)")
+
+    # Анотація
+    abstract_start, abstract_end = sections.span("abstract")
+    italicize_abstract(paragraphs[abstract_start:abstract_end])
+
+    check_abstract_length(sections, report)
+    report.append("Анотація перевірена та відформатована (курсив)")
+
+
+def check_abstract_length(sections, report):
+    abstract_start, abstract_end = sections.span("abstract")
+    abstract_length = sum(len(text) + 1 for text in sections.texts[abstract_start:abstract_end])
+    if abstract_length < 1800 or abstract_length > 2500:
+        report.append(f"⚠️ Попередження: довжина анотації {abstract_length} символів (рекомендовано 1800–2500)")
+
+
+# 2.X ДРУГА МОВНА ВЕРСІЯ
+def fix_second_language(paragraphs, sections, report):
+    texts = sections.texts
+    if "title2" not in sections:
+        return
+
+    title2_index, _ = sections.span("title2")
+    title2_para = paragraphs[title2_index]
+    _set_text(paragraphs, sections, title2_index, format_title(texts[title2_index]))
+    for run in title2_para.runs: run.font.bold = True
+    report.append("Назва другою мовою перевірена та приведена до формату")
+
+    if "authors2" not in sections:
+        return
+
+    authors2_index, _ = sections.span("authors2")
+    authors2_para = paragraphs[authors2_index]
+    _set_text(paragraphs, sections, authors2_index, format_authors(texts[authors2_index]))
+    for run in authors2_para.runs:
+        run.font.bold, run.font.italic = True, True
+    report.append("Автори другою мовою відформатовані")
+
+    affiliation2_start, affiliation2_end = sections.span("affiliations2")
+    affiliation2_paragraphs = paragraphs[affiliation2_start:affiliation2_end]
+    for para in affiliation2_paragraphs:
+        for run in para.runs:
+            run.font.bold, run.font.italic = False, False
+    report.append(f"Афіліація другою мовою перевірена ({len(affiliation2_paragraphs)} рядків)")
+
+    abstract2_start, abstract2_end = sections.span("abstract2")
+    italicize_abstract(paragraphs[abstract2_start:abstract2_end])
+    report.append("Анотація другою мовою перевірена та відформатована (курсив)")
+
+
+# 3. Перевірка наявності структурних елементів (правила — у profiles.py)
+def check_structure(sections, language, article_type, report, journal=DEFAULT_JOURNAL):
+    # Заголовки зіставлено із профілями ще під час сегментації
+    missing_elements = get_profile(language, article_type, journal).missing(sections.found_elements())
+
+    if missing_elements:
+        report.append("❌ Відсутні або неправильно оформлені структурні елементи:")
+        for item in missing_elements: report.append(f"   - {item}")
+    else: report.append("✅ Усі обов’язкові структурні елементи присутні та оформлені правильно")
+
+
+def _number_list(numbers, limit=10):
+    shown = ", ".join(str(n) for n in numbers[:limit])
+    return shown + (f" … (усього {len(numbers)})" if len(numbers) > limit else "")
+
+
+# ПЕРЕВІРКА ЛІТЕРАТУРИ (межі — із SectionMap, аналіз списку — у references.py)
+def check_references(sections, article_type, report):
+    if "references" not in sections:
+        report.append("❌ Не знайдено розділ літератури")
+        return
+    refs = analyze_references(sections.texts, sections.span("references"))
+
+    reference_count = refs.count
+
+    # --- Перевірка кількості ---
+    if article_type in ["original", "case"]:
+        if reference_count > 15:
+            report.append(f"⚠️ Джерел: {reference_count} (допустимо не більше 15)")
+        else:
+            report.append(f"Кількість джерел: {reference_count}")
+    elif article_type == "review":
+        if reference_count < 50:
+            report.append(f"⚠️ Джерел: {reference_count} (для огляду потрібно не менше 50)")
+        else:
+            report.append(f"Кількість джерел: {reference_count}")
+
+    # --- Базова перевірка Vancouver ---
+    if refs.vancouver_errors:
+        report.append("⚠️ Можливе порушення Vancouver style (не знайдено рік або порушено формат)")
+    else:
+        report.append("Стиль літератури виглядає коректним (базова перевірка)")
+
+    # --- Дублікати та посилання [n] у тексті ---
+    if refs.duplicates:
+        pairs = [f"{first} = {dup}" for first, dup in refs.duplicates]
+        report.append(f"⚠️ Можливі дублікати джерел: {_number_list(pairs)}")
+    if refs.citations:
+        if refs.missing_citations:
+            report.append(f"⚠️ Посилання на відсутні у списку джерела: {_number_list(refs.missing_citations)}")
+        if refs.uncited:
+            report.append(f"⚠️ Джерела без посилань у тексті: {_number_list(refs.uncited)}")
+
+    report.append(f"Перевірено розділ: {refs.title}")
+
+
+def format_document(data, file_name="document.docx", text_format="xml", save_mode="passthrough", out=None,
+                    stage_timer=None):
+    """Етапи, що не залежать від мови й типу статті: форматування та збереження.
+
+    Повертає (виправлений файл, звіт, тексти абзаців після форматування).
+    Тексти — знімок для check_document(): перевірки для інших мови чи типу
+    статті не потребують повторного читання .docx.
+    """
+    fixed, report, sections = _format_document(data, file_name, text_format, save_mode, out, stage_timer)
+    return fixed, report, sections.texts
+
+
+def _format_document(data, file_name, text_format, save_mode, out, stage_timer):
+    """format_document(), що повертає SectionMap замість текстів."""
+    if save_mode not in SAVE_MODES:
+        raise ValueError(f"Невідомий режим збереження: {save_mode}")
+
+    stage = stage_timer or no_timer
+    report = []
+
+    # Завантаження
+    with stage("load"):
+        source = io.BytesIO(data) if isinstance(data, (bytes, bytearray, memoryview)) else data
+        source.seek(0)
+        doc = Document(source)
+    report.append("Файл завантажено: " + file_name)
+
+    with stage("margins"):
+        fix_margins(doc, report)
+    with stage("text_format"):
+        TEXT_FORMATTERS[text_format](doc, report)
+
+    # Тексти абзаців читаються один раз; далі етапи працюють із SectionMap
+    with stage("segment"):
+        paragraphs = doc.paragraphs
+        sections = segment_document([paragraph.text for paragraph in paragraphs])
+    with stage("header"):
+        fix_header_block(paragraphs, sections, report)
+    with stage("second_language"):
+        fix_second_language(paragraphs, sections, report)
+
+    # 2.6 Збереження файлу
+    with stage("save"):
+        dest = io.BytesIO() if out is None else out
+        if save_mode == "passthrough":
+            save_passthrough(doc, source, dest)
+        else:
+            doc.save(dest)
+    return (dest.getvalue() if out is None else out), report, sections
+
+
+def check_document(texts, language="uk", article_type="original", journal=DEFAULT_JOURNAL, stage_timer=None):
+    """Перевірки, що залежать від мови й типу статті (3. структура, література).
+
+    Працює лише з текстами абзаців, тож при зміні параметрів виконується
+    миттєво. texts — список (збережений знімок; сегментується один раз) або
+    SectionMap з того ж процесу. Повертає рядки звіту, які йдуть після рядків
+    format_document().
+    """
+    if language not in LANGUAGES:
+        raise ValueError(f"Невідома мова: {language}")
+    if article_type not in ARTICLE_TYPES:
+        raise ValueError(f"Невідомий тип статті: {article_type}")
+
+    stage = stage_timer or no_timer
+    report = []
+    with stage("structure"):
+        sections = texts if isinstance(texts, SectionMap) else segment_document(texts)
+        check_structure(sections, language, article_type, report, journal)
+    with stage("references"):
+        check_references(sections, article_type, report)
+    return report
+
+
+def process_document(data, language="uk", article_type="original", file_name="document.docx", journal=DEFAULT_JOURNAL,
+                     text_format="xml", save_mode="passthrough", out=None, stage_timer=None):
+    """Форматує .docx і повертає (виправлений файл, звіт).
+
+    data — bytes або двійковий file-like з seek (наприклад, UploadedFile).
+    text_format: "xml" — швидке форматування тексту над XML, "docx" — через
+    об'єкти python-docx (еталонний режим для порівняння, результат однаковий).
+    save_mode: "passthrough" — заново записується лише word/document.xml,
+    решта архіву копіюється потоково; "docx" — звичайний doc.save().
+    out — file-like для запису результату; якщо не задано, повертаються bytes,
+    інакше повертається сам out.
+    stage_timer — необов'язкова функція stage_timer(назва) → контекстний
+    менеджер, яким обгортається кожен етап (див. STAGES); для вимірювань.
+    """
+    if language not in LANGUAGES:
+        raise ValueError(f"Невідома мова: {language}")
+    if article_type not in ARTICLE_TYPES:
+        raise ValueError(f"Невідомий тип статті: {article_type}")
+
+    fixed, report, sections = _format_document(data, file_name, text_format, save_mode, out, stage_timer)
+    report += check_document(sections, language, article_type, journal, stage_timer)
+    return fixed, report
+
+
+def group_report(report):
+    """Групує рядки звіту за розділами для відображення."""
+    sections = {"Файл": [], "Поля сторінки": [], "Формат тексту": [], "Назва/УДК/Автори": [], "Інше": []}
+    for item in report:
+        if "Файл завантажено" in item: sections["Файл"].append(item)
+        elif "поле" in item: sections["Поля сторінки"].append(item)
+        elif any(x in item for x in ["шрифт", "міжрядковий", "відступ", "формат тексту"]): sections["Формат тексту"].append(item)
+        elif any(x in item for x in ["УДК", "Назва", "Автори"]): sections["Назва/УДК/Автори"].append(item)
+        else: sections["Інше"].append(item)
+    return {sec: list(dict.fromkeys(items)) for sec, items in sections.items() if items}
@@ -0,0 +1,329 @@
+import json
+import logging
+import os
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from cache import cache_lookup, make_key
+from worker_pool import ProcessingError
+
+# ============================================================
+# ЧЕРГА ЗАВДАНЬ (SQLite + файли на диску)
+# ============================================================
+# submit() зберігає вхідний файл у каталозі черги, додає рядок у jobs.sqlite3
+# і одразу повертає ідентифікатор завдання. Фонові потоки-диспетчери беруть
+# завдання з черги й виконують їх у WorkerPool (ізольовані процеси). Статус,
+# звіт, тексти абзаців, метрики й час очікування/обробки зберігаються в базі,
+# виправлений файл — поруч, тож результат переживає перезавантаження сторінки
+# й перезапуск сервера.
+#
+# Каталог черги можуть спільно використовувати кілька процесів. Процес, що
+# виконує завдання, володіє ним (owner) і періодично оновлює heartbeat; у
+# чергу повертаються лише завдання, чий власник завершився (той самий хост)
+# або не оновлював heartbeat довше за LEASE_TIMEOUT.
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+FINISHED = (DONE, FAILED)
+
+COPY_CHUNK = 1024 * 1024
+
+HEARTBEAT_INTERVAL = 10     # с між оновленнями heartbeat і обслуговуванням черги
+LEASE_TIMEOUT = 60          # с без heartbeat, після яких завдання вважається покинутим
+PURGE_INTERVAL = 3600       # с між видаленнями застарілих завдань (не частіше за ttl)
+
+log = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    file_name TEXT NOT NULL,
+    cache_key TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    from_cache INTEGER NOT NULL DEFAULT 0,
+    report TEXT,
+    texts TEXT,
+    metrics TEXT,
+    error TEXT,
+    owner TEXT,
+    heartbeat REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created);
+"""
+
+
+class QueueFull(ProcessingError):
+    pass
+
+
+class JobQueue:
+    """Персистентна черга завдань форматування з пулом фонових диспетчерів.
+
+    directory — каталог бази та файлів; pool — WorkerPool; workers — кількість
+    диспетчерів (за замовчуванням pool.size); max_queued — найбільша кількість
+    завдань, що чекають у черзі; cache — ResultCache (влучання завершуються
+    одразу); on_finished(job) — викликається після кожного завершеного
+    завдання; ttl — секунд зберігання завершених завдань.
+    """
+
+    def __init__(self, directory, pool, workers=None, max_queued=100, cache=None, on_finished=None, ttl=None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.directory / "jobs.sqlite3"
+        self.pool = pool
+        self.max_queued = max_queued
+        self.cache = cache
+        self.on_finished = on_finished
+        self.ttl = ttl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._wakeup = threading.Condition()
+        self._stop = threading.Event()
+        self._closed = False
+        self._last_purge = 0.0
+
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_SCHEMA)
+            columns = {row["name"] for row in db.execute("PRAGMA table_info(jobs)")}
+            for column, kind in (("owner", "TEXT"), ("heartbeat", "REAL")):
+                if column not in columns:
+                    db.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self._maintain()
+
+        self._threads = [threading.Thread(target=self._dispatch, name=f"cep-jobs-{i}", daemon=True)
+                         for i in range(workers or pool.size)]
+        self._threads.append(threading.Thread(target=self._heartbeat, name="cep-jobs-heartbeat", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def _connect(self):
+        db = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        return _Connection(db)
+
+    def _paths(self, job_id):
+        return self.directory / f"{job_id}.docx", self.directory / f"{job_id}.fixed.docx"
+
+    # ---- Подання та стан завдань ----
+
+    def submit(self, source, file_name="document.docx"):
+        """Ставить файл у чергу; повертає ідентифікатор завдання."""
+        job_id = uuid.uuid4().hex
+        key = make_key(source)
+        input_path, result_path = self._paths(job_id)
+        now = time.time()
+
+        entry = cache_lookup(self.cache, key, file_name) if self.cache is not None else None
+        if entry is not None:
+            fixed, report, texts = entry
+            result_path.write_bytes(fixed)
+            with self._connect() as db:
+                db.execute("INSERT INTO jobs (id, file_name, cache_key, status, created, started, finished, from_cache,"
+                           " report, texts, metrics) VALUES (?, ?, ?, ?, ?, ?, ?, 1, ?, ?, '{}')",
+                           (job_id, file_name, key, DONE, now, now, now, json.dumps(report, ensure_ascii=False),
+                            json.dumps(texts, ensure_ascii=False)))
+            self._finished(job_id)
+            return job_id
+
+        with self._connect() as db:
+            queued = db.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (QUEUED,)).fetchone()[0]
+        if queued >= self.max_queued:
+            raise QueueFull(f"❌ Черга заповнена ({queued} файлів очікують). Спробуйте пізніше.")
+
+        with open(input_path, "wb") as f:
+            if isinstance(source, (bytes, bytearray, memoryview)):
+                f.write(source)
+            else:
+                source.seek(0)
+                shutil.copyfileobj(source, f, COPY_CHUNK)
+                source.seek(0)
+        with self._connect() as db:
+            db.execute("INSERT INTO jobs (id, file_name, cache_key, status, created) VALUES (?, ?, ?, ?, ?)",
+                       (job_id, file_name, key, QUEUED, now))
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def get(self, job_id):
+        """Стан завдання (dict) або None. Для завдань у черзі — position (з 1)."""
+        with self._connect() as db:
+            row = db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            job = _job_dict(row)
+            if job["status"] == QUEUED:
+                job["position"] = db.execute("SELECT COUNT(*) FROM jobs WHERE status = ? AND created <= ?",
+                                             (QUEUED, job["created"])).fetchone()[0]
+        return job
+
+    def result(self, job_id):
+        """Виправлений .docx завершеного завдання."""
+        return self._paths(job_id)[1].read_bytes()
+
+    def purge(self, older_than):
+        """Видаляє завершені завдання, старші за older_than секунд."""
+        cutoff = time.time() - older_than
+        with self._connect() as db:
+            ids = [row[0] for row in db.execute("SELECT id FROM jobs WHERE status IN (?, ?) AND finished < ?",
+                                                (*FINISHED, cutoff))]
+            db.execute("DELETE FROM jobs WHERE status IN (?, ?) AND finished < ?", (*FINISHED, cutoff))
+        for job_id in ids:
+            for path in self._paths(job_id):
+                path.unlink(missing_ok=True)
+
+    def close(self):
+        self._closed = True
+        self._stop.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join()
+
+    # ---- Диспетчери ----
+
+    def _claim(self):
+        """Атомарно бере найстаріше завдання з черги (між потоками й процесами)."""
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute("SELECT id, file_name FROM jobs WHERE status = ? ORDER BY created LIMIT 1",
+                             (QUEUED,)).fetchone()
+            if row is not None:
+                now = time.time()
+                db.execute("UPDATE jobs SET status = ?, started = ?, owner = ?, heartbeat = ? WHERE id = ?",
+                           (RUNNING, now, self.owner, now, row["id"]))
+            db.execute("COMMIT")
+        return row
+
+    def _dispatch(self):
+        while not self._closed:
+            try:
+                row = self._claim()
+            except sqlite3.Error:
+                log.exception("Не вдалося взяти завдання з черги")
+                row = None
+            if row is None:
+                # Чекаємо на submit(); тайм-аут — для завдань, поданих іншим процесом
+                with self._wakeup:
+                    self._wakeup.wait(timeout=1.0)
+                continue
+            try:
+                self._run(row["id"], row["file_name"])
+            except Exception as exc:
+                log.exception("Завдання %s завершилося помилкою", row["id"])
+                try:
+                    self._fail(row["id"], f"❌ Помилка обробки: {type(exc).__name__}: {exc}")
+                except sqlite3.Error:
+                    log.exception("Не вдалося позначити завдання %s як невдале", row["id"])
+            self._finished(row["id"])
+
+    def _run(self, job_id, file_name):
+        input_path, result_path = self._paths(job_id)
+        try:
+            fixed, report, texts, stages = self.pool.run(input_path, file_name=file_name)
+        except ProcessingError as exc:
+            self._fail(job_id, str(exc))
+            return
+        finally:
+            input_path.unlink(missing_ok=True)
+        result_path.write_bytes(fixed)
+        with self._connect() as db:
+            # Завдання, яке тим часом забрав інший процес (lease втрачено), не перезаписується
+            db.execute("UPDATE jobs SET status = ?, finished = ?, report = ?, texts = ?, metrics = ? "
+                       "WHERE id = ? AND owner = ?",
+                       (DONE, time.time(), json.dumps(report, ensure_ascii=False),
+                        json.dumps(texts, ensure_ascii=False), json.dumps(stages), job_id, self.owner))
+            key = db.execute("SELECT cache_key FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+        if self.cache is not None:
+            try:
+                self.cache.put(key, fixed, report, texts)
+            except OSError:
+                log.exception("Не вдалося зберегти результат завдання %s у кеш", job_id)
+
+    def _fail(self, job_id, error):
+        with self._connect() as db:
+            db.execute("UPDATE jobs SET status = ?, finished = ?, error = ? WHERE id = ? AND owner = ?",
+                       (FAILED, time.time(), error, job_id, self.owner))
+
+    def _finished(self, job_id):
+        if self.on_finished is None:
+            return
+        try:
+            job = self.get(job_id)
+            if job is not None and job["status"] in FINISHED:
+                self.on_finished(job)
+        except Exception:
+            log.exception("Помилка в on_finished для завдання %s", job_id)
+
+    # ---- Heartbeat та обслуговування ----
+
+    def _heartbeat(self):
+        while not self._stop.wait(HEARTBEAT_INTERVAL):
+            try:
+                with self._connect() as db:
+                    db.execute("UPDATE jobs SET heartbeat = ? WHERE owner = ? AND status = ?",
+                               (time.time(), self.owner, RUNNING))
+                self._maintain()
+            except sqlite3.Error:
+                log.exception("Помилка обслуговування черги")
+
+    def _maintain(self):
+        """Повертає в чергу покинуті завдання; раз на PURGE_INTERVAL видаляє застарілі."""
+        now = time.time()
+        with self._connect() as db:
+            rows = db.execute("SELECT id, owner, heartbeat FROM jobs WHERE status = ? AND (owner IS NULL OR owner != ?)",
+                              (RUNNING, self.owner)).fetchall()
+            for row in rows:
+                if row["heartbeat"] is None or row["heartbeat"] < now - LEASE_TIMEOUT or not _owner_alive(row["owner"]):
+                    db.execute("UPDATE jobs SET status = ?, started = NULL, owner = NULL, heartbeat = NULL "
+                               "WHERE id = ? AND status = ? AND owner IS ?", (QUEUED, row["id"], RUNNING, row["owner"]))
+        if rows:
+            with self._wakeup:
+                self._wakeup.notify_all()
+        if self.ttl is not None and now - self._last_purge >= min(self.ttl, PURGE_INTERVAL):
+            self._last_purge = now
+            self.purge(self.ttl)
+
+
+class _Connection:
+    """sqlite3-з'єднання, що закривається в кінці with (контекст sqlite3 лише фіксує транзакцію)."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        return self.db
+
+    def __exit__(self, *exc):
+        self.db.close()
+
+
+def _owner_alive(owner):
+    """False, лише якщо власник — процес на цьому ж хості, який уже завершився."""
+    host, _, rest = (owner or "").partition(":")
+    pid = rest.partition(":")[0]
+    if host != socket.gethostname() or not pid.isdigit():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+def _job_dict(row):
+    job = dict(row)
+    for field in ("report", "texts", "metrics"):
+        job[field] = json.loads(job[field]) if job[field] else ([] if field != "metrics" else {})
+    job["from_cache"] = bool(job["from_cache"])
+    job["wait_s"] = job["started"] - job["created"] if job["started"] else None
+    job["processing_s"] = job["finished"] - job["started"] if job["finished"] and job["started"] else None
+    return job
@@ -0,0 +1,161 @@
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from formatter import format_document
+
+# ============================================================
+# МЕТРИКИ ЕТАПІВ КОНВЕЄРА
+# ============================================================
+# StageMetrics передається у process_document(stage_timer=...) і для кожного
+# етапу записує wall-time, CPU-time потоку та лічильники виділення пам'яті.
+# MetricsRegistry накопичує їх по всіх оброблених файлах і віддає JSON або
+# текстовий формат Prometheus.
+
+# Межі гістограми тривалості етапів, секунди
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class StageMetrics:
+    """stage_timer для process_document(): метрики кожного етапу одного файлу.
+
+    alloc_blocks — приріст кількості блоків пам'яті Python (дешево, завжди;
+    пам'ять lxml/libxml2, що переважає в load і save, сюди не потрапляє).
+    Обидва прирости чисті, тобто можуть бути від'ємними. Якщо запущено tracemalloc (наприклад, CEP_TRACE_MEMORY=1), додаються
+    alloc_bytes (чистий приріст) і peak_bytes (пік під час етапу). Пік
+    tracemalloc спільний для процесу, тож при паралельній обробці в потоках
+    він наближений.
+    """
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextlib.contextmanager
+    def __call__(self, name):
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            memory_before = tracemalloc.get_traced_memory()[0]
+        blocks_before = sys.getallocatedblocks()
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            stage = {"wall_s": time.perf_counter() - wall, "cpu_s": time.thread_time() - cpu,
+                     "alloc_blocks": sys.getallocatedblocks() - blocks_before}
+            if tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                stage["alloc_bytes"] = current - memory_before
+                stage["peak_bytes"] = peak - memory_before
+            self.stages[name] = stage
+
+    def total(self, key="wall_s"):
+        return sum(stage.get(key, 0) for stage in self.stages.values())
+
+    def to_dict(self):
+        return {name: dict(stage) for name, stage in self.stages.items()}
+
+
+class MetricsRegistry:
+    """Накопичує метрики етапів по всіх файлах (потокобезпечно)."""
+
+    def __init__(self, prefix="cep_formatter"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.documents = 0
+        self.cache_hits = 0
+        self._stages = {}
+
+    def observe(self, stages):
+        """stages — StageMetrics або його to_dict()."""
+        if isinstance(stages, StageMetrics):
+            stages = stages.stages
+        with self._lock:
+            self.documents += 1
+            for name, stage in stages.items():
+                agg = self._stages.setdefault(name, {"count": 0, "wall_s": 0.0, "cpu_s": 0.0, "alloc_blocks": 0,
+                                                     "traced": 0, "alloc_bytes": 0, "peak_bytes": 0,
+                                                     "buckets": [0] * len(DURATION_BUCKETS)})
+                agg["count"] += 1
+                agg["wall_s"] += stage["wall_s"]
+                agg["cpu_s"] += stage["cpu_s"]
+                agg["alloc_blocks"] += stage.get("alloc_blocks", 0)
+                if "alloc_bytes" in stage:
+                    agg["traced"] += 1
+                    agg["alloc_bytes"] += stage["alloc_bytes"]
+                    agg["peak_bytes"] += stage["peak_bytes"]
+                for i, bound in enumerate(DURATION_BUCKETS):
+                    if stage["wall_s"] <= bound:
+                        agg["buckets"][i] += 1
+
+    def observe_cache_hit(self):
+        with self._lock:
+            self.cache_hits += 1
+
+    def to_dict(self):
+        with self._lock:
+            return {"documents": self.documents, "cache_hits": self.cache_hits,
+                    "stages": {name: {k: (list(v) if k == "buckets" else v) for k, v in agg.items()}
+                               for name, agg in self._stages.items()}}
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+
+    def render_prometheus(self):
+        data = self.to_dict()
+        p = self.prefix
+        lines = [f"# HELP {p}_documents_total Processed documents.", f"# TYPE {p}_documents_total counter",
+                 f"{p}_documents_total {data['documents']}",
+                 f"# HELP {p}_cache_hits_total Results served from the cache.", f"# TYPE {p}_cache_hits_total counter",
+                 f"{p}_cache_hits_total {data['cache_hits']}",
+                 f"# HELP {p}_stage_duration_seconds Wall time per pipeline stage.",
+                 f"# TYPE {p}_stage_duration_seconds histogram"]
+        for name, agg in data["stages"].items():
+            # Кошики вже накопичувальні: кожен рахує етапи з wall_s <= bound
+            for bound, count in zip(DURATION_BUCKETS, agg["buckets"]):
+                lines.append(f'{p}_stage_duration_seconds_bucket{{stage="{name}",le="{bound}"}} {count}')
+            lines.append(f'{p}_stage_duration_seconds_bucket{{stage="{name}",le="+Inf"}} {agg["count"]}')
+            lines.append(f'{p}_stage_duration_seconds_sum{{stage="{name}"}} {agg["wall_s"]:.6f}')
+            lines.append(f'{p}_stage_duration_seconds_count{{stage="{name}"}} {agg["count"]}')
+        # Чисті прирости пам'яті бувають від'ємними, тож це не лічильники, а середні за
+        # етап (gauge); монотонний лічильник — сума піків tracemalloc. Метрики без значень
+        # (наприклад, tracemalloc вимкнено) не виводяться.
+        for metric, key, count_key, kind, help_text in (
+                ("stage_cpu_seconds_total", "cpu_s", None, "counter", "CPU time per pipeline stage."),
+                ("stage_alloc_blocks_mean", "alloc_blocks", "count", "gauge",
+                 "Mean net change of allocated Python memory blocks per stage (excludes lxml/libxml2 memory)."),
+                ("stage_alloc_bytes_mean", "alloc_bytes", "traced", "gauge",
+                 "Mean net traced allocation per stage, bytes (tracemalloc)."),
+                ("stage_peak_bytes_total", "peak_bytes", None, "counter",
+                 "Sum of per-stage traced memory peaks above the stage start, bytes (tracemalloc).")):
+            present = "traced" if key in ("alloc_bytes", "peak_bytes") else "count"
+            stages = [(name, agg) for name, agg in data["stages"].items() if agg[present]]
+            if not stages:
+                continue
+            lines.append(f"# HELP {p}_{metric} {help_text}")
+            lines.append(f"# TYPE {p}_{metric} {kind}")
+            for name, agg in stages:
+                value = agg[key] / agg[count_key] if count_key else agg[key]
+                lines.append(f'{p}_{metric}{{stage="{name}"}} {value:.6f}' if isinstance(value, float)
+                             else f'{p}_{metric}{{stage="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Атомарно записує файл для textfile-колектора node_exporter."""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp, path)
+
+
+def format_document_measured(data, **kwargs):
+    """format_document() зі StageMetrics; повертає також метрики (для пулу процесів)."""
+    stage_metrics = StageMetrics()
+    fixed, report, texts = format_document(data, stage_timer=stage_metrics, **kwargs)
+    return fixed, report, texts, stage_metrics.to_dict()
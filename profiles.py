@@ -0,0 +1,101 @@
+from functools import lru_cache
+
+# ============================================================
+# ПРОФІЛІ ЖУРНАЛІВ: обов'язкові структурні елементи
+# ============================================================
+# Профіль = журнал → мова статті → тип статті → розділ → заголовки.
+# Щоб додати інший журнал, достатньо додати ще один ключ у JOURNAL_PROFILES.
+
+DEFAULT_JOURNAL = "cep"
+
+JOURNAL_PROFILES = {
+    # Клінічна та експериментальна патологія
+    "cep": {
+        "uk": {
+            "original": {
+                "abstract_uk": ["Мета дослідження", "Матеріали і методи", "Результати", "Висновки", "Ключові слова"],
+                "abstract_en": ["Objective", "Materials and methods", "Results", "Conclusions", "Key words"],
+                "main_text": ["Вступ", "Мета роботи", "Матеріал і методи дослідження", "Результати та їх обговорення", "Висновки", "Перспективи подальших досліджень", "Список літератури", "References", "Відомості про авторів"]
+            },
+            "case": {
+                "abstract_uk": ["Висновки"], "abstract_en": ["Conclusions"],
+                "main_text": ["Вступ", "Опис клінічного випадку", "Висновки", "Список літератури", "References", "Відомості про авторів"]
+            },
+            "review": {
+                "abstract_uk": ["Мета роботи", "Основна частина", "Висновки"],
+                "abstract_en": ["Objective", "Main Text", "Conclusions"],
+                "main_text": ["Вступ", "Мета роботи", "Основна частина", "Висновки", "Список літератури", "References", "Відомості про авторів"]
+            }
+        },
+        "en": {
+            "original": {
+                "abstract_en": ["Objective", "Materials and methods", "Results", "Conclusions", "Key words"],
+                "abstract_uk": ["Мета дослідження", "Матеріали і методи", "Результати", "Висновки", "Ключові слова"],
+                "main_text": ["Introduction", "Objective", "Materials and Methods", "Results and Discussion", "Conclusions", "Prospects for further research", "References", "Information about authors"]
+            },
+            "case": {
+                "abstract_en": ["Conclusions"], "abstract_uk": ["Висновки"],
+                "main_text": ["Introduction", "Case description", "Conclusions", "References", "Information about authors"]
+            },
+            "review": {
+                "abstract_en": ["Objective", "Materials and methods", "Results", "Conclusions", "Key words"],
+                "abstract_uk": ["Мета дослідження", "Матеріали і методи", "Результати", "Висновки", "Ключові слова"],
+                "main_text": ["Introduction", "Objective", "Main part", "Conclusions", "References", "Information about authors"]
+            }
+        }
+    }
+}
+
+
+class CompiledProfile:
+    """Правила одного профілю, скомпільовані в префіксне дерево (trie).
+
+    Один прохід по текстах абзаців знаходить усі заголовки, з яких
+    починаються абзаци: вартість O(сума довжин абзаців), а не
+    O(елементи × абзаци).
+    """
+
+    def __init__(self, structure):
+        # Порядок (розділ, елемент) зберігається для звіту
+        self.elements = [(section, element) for section, elements in structure.items() for element in elements]
+        self.keys = {element.lower() for _, element in self.elements}
+        self.trie = {}
+        self.max_depth = 0
+        for _, element in self.elements:
+            key = element.lower()
+            node = self.trie
+            for ch in key:
+                node = node.setdefault(ch, {})
+            node[None] = key  # кінцевий вузол зберігає сам префікс
+            self.max_depth = max(self.max_depth, len(key))
+
+    def match(self, text):
+        """Усі заголовки профілю, якими починається текст (у нижньому регістрі)."""
+        found = []
+        node = self.trie
+        for ch in text[:self.max_depth]:
+            node = node.get(ch)
+            if node is None:
+                break
+            if None in node:
+                found.append(node[None])
+        return found
+
+    def find_missing(self, texts):
+        """Повертає ["розділ: елемент", ...] для заголовків, яких немає в texts."""
+        found = set()
+        for text in texts:
+            found.update(self.match(text.lstrip()[:self.max_depth].lower()))
+            if len(found) == len(self.keys):
+                break
+        return self.missing(found)
+
+    def missing(self, found):
+        """Те саме за вже знайденими заголовками (у нижньому регістрі), напр. SectionMap.found_elements()."""
+        return [f"{section}: {element}" for section, element in self.elements if element.lower() not in found]
+
+
+@lru_cache(maxsize=None)
+def get_profile(language, article_type, journal=DEFAULT_JOURNAL):
+    """Компілює профіль один раз на процес."""
+    return CompiledProfile(JOURNAL_PROFILES[journal][language][article_type])
@@ -0,0 +1,139 @@
+import re
+import unicodedata
+
+# ============================================================
+# АНАЛІЗ СПИСКУ ЛІТЕРАТУРИ
+# ============================================================
+# Один прохід по текстах абзаців: до заголовка списку збираються посилання
+# [n] у тексті, після нього — записи списку (нумерація, рік, дублікати) до
+# першого стоп-заголовка. Межі списку знаходить сегментатор (segments.py) за
+# reference_stop_titles() і ends_reference_list(). Усі шаблони скомпільовані
+# один раз, тож вартість лінійна за розміром документа навіть для оглядів із
+# сотнями джерел.
+
+# Заголовок списку → заголовки, на яких список закінчується
+REFERENCE_TITLES = {
+    "список літератури": ("references",),  # Якщо почали з укр, зупиняємось на англ
+    "references": ("відомості про авторів", "information about authors"),  # Якщо почали з англ
+}
+
+_NUMBER_RE = re.compile(r"^(\d+)[\.\)]")
+_YEAR_RE = re.compile(r"\b(19|20)\d{2}\b")
+_CONTACT_RE = re.compile(r"(author|email|e-mail|correspondence|адреса|контакт)")
+_CITATION_RE = re.compile(r"\[(\d+(?:\s*[-–—,;]\s*\d+)*)\]")
+_CITATION_PART_RE = re.compile(r"(\d+)(?:\s*[-–—]\s*(\d+))?")
+_LEADING_NUMBER_RE = re.compile(r"^\s*\d+\s*[\.\)]\s*")
+_NON_WORD_RE = re.compile(r"[\W_]+")
+
+# Діапазони на кшталт [1-100000] не розгортаємо повністю
+MAX_CITATION_RANGE = 1000
+
+# Роки в дужках («дані ВООЗ [2019]», «[2018–2020]») — не посилання на джерела
+_BRACKET_YEAR_RE = re.compile(r"(19|20)\d{2}")
+
+
+class ReferenceList:
+    """Результат analyze_references()."""
+
+    def __init__(self, title, start):
+        self.title = title              # заголовок розділу, як у документі
+        self.start = start              # індекс першого абзацу після заголовка
+        self.entries = []               # [(індекс абзацу, текст)]
+        self.numbering_errors = False
+        self.missing_year = []          # номери записів (з 1) без року
+        self.duplicates = []            # [(номер першого, номер дубліката)]
+        self.citations = {}             # номер джерела → індекс першого абзацу з посиланням
+
+    @property
+    def count(self):
+        return len(self.entries)
+
+    @property
+    def vancouver_errors(self):
+        return bool(self.missing_year)
+
+    @property
+    def missing_citations(self):
+        """Номери з посилань [n], яких немає у списку."""
+        return sorted(n for n in self.citations if n < 1 or n > self.count)
+
+    @property
+    def uncited(self):
+        """Номери джерел, на які немає жодного посилання в тексті."""
+        return [n for n in range(1, self.count + 1) if n not in self.citations]
+
+
+def normalize_reference(text):
+    """Ключ для пошуку дублікатів: без номера, регістру, пунктуації та діакритики."""
+    text = _LEADING_NUMBER_RE.sub("", text)
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _NON_WORD_RE.sub(" ", text).strip()
+
+
+def _add_citations(citations, text, index):
+    for match in _CITATION_RE.finditer(text):
+        for part in _CITATION_PART_RE.finditer(match.group(1)):
+            if all(_BRACKET_YEAR_RE.fullmatch(n) for n in part.groups() if n):
+                continue
+            first = int(part.group(1))
+            last = int(part.group(2)) if part.group(2) else first
+            numbers = range(first, last + 1) if 0 <= last - first <= MAX_CITATION_RANGE else (first, last)
+            for number in numbers:
+                citations.setdefault(number, index)
+
+
+def reference_stop_titles(text_lower):
+    """Стоп-заголовки, якщо рядок (strip().lower()) — заголовок списку літератури, інакше None."""
+    for title, stop_titles in REFERENCE_TITLES.items():
+        if text_lower.startswith(title):
+            return stop_titles
+    return None
+
+
+def ends_reference_list(text_lower, stop_titles):
+    """Чи закінчує непорожній рядок список: стоп-заголовок або контактна інформація."""
+    return text_lower.startswith(stop_titles) or _CONTACT_RE.search(text_lower) is not None
+
+
+def analyze_references(texts, span):
+    """Аналізує список літератури в межах span — (заголовок, кінець) із SectionMap."""
+    start, end = span
+    refs = ReferenceList(texts[start].strip(), start + 1)
+    seen = {}
+    expected_number = 1
+
+    # Посилання [n] у тексті до заголовка списку
+    for i in range(start):
+        if "[" in texts[i]:
+            _add_citations(refs.citations, texts[i], i)
+
+    for i in range(start + 1, end):
+        text = texts[i].strip()
+        if not text:
+            continue
+
+        refs.entries.append((i, text))
+        number = len(refs.entries)
+
+        # Перевірка нумерації
+        match = _NUMBER_RE.match(text)
+        if match:
+            if int(match.group(1)) != expected_number:
+                refs.numbering_errors = True
+            expected_number += 1
+        else:
+            refs.numbering_errors = True
+
+        # Перевірка року (має бути 4 цифри)
+        if not _YEAR_RE.search(text):
+            refs.missing_year.append(number)
+
+        # Дублікати за нормалізованим текстом
+        key = normalize_reference(text)
+        if key in seen:
+            refs.duplicates.append((seen[key], number))
+        else:
+            seen[key] = number
+
+    return refs
@@ -0,0 +1,165 @@
+import re
+from array import array
+from bisect import bisect_left
+
+from profiles import JOURNAL_PROFILES, CompiledProfile
+from references import ends_reference_list, reference_stop_titles
+
+# ============================================================
+# СЕГМЕНТАЦІЯ СТАТТІ ЗА ОДИН ПРОХІД
+# ============================================================
+# paragraph.text у python-docx щоразу збирається з XML заново, тому тексти
+# абзаців читаються один раз у знімок. За той самий прохід позначаються
+# порожні абзаци, рядки «Ключові слова»/«Keywords» і межі списку літератури;
+# з цих позначок обчислюються межі всіх розділів. У тому ж проході абзаци
+# зіставляються із заголовками всіх профілів журналів (profiles.py): звідси
+# межі підрозділів основного тексту й дані для перевірки структури будь-якою
+# мовою та типом статті. Етапи форматування та перевірки читають SectionMap
+# замість повторних сканувань документа.
+
+# Розділи у порядку статті; межі — півінтервали [start, end) індексів абзаців
+SECTIONS = ("udc", "title", "authors", "affiliations", "abstract",
+            "title2", "authors2", "affiliations2", "abstract2", "body", "references")
+_SECTION_INDEX = {name: i for i, name in enumerate(SECTIONS)}
+
+BLANK = 1
+
+_STRUCTURES = [structure for journal in JOURNAL_PROFILES.values()
+               for language in journal.values() for structure in language.values()]
+# Усі структурні елементи всіх профілів (один trie) і заголовки основного тексту серед них
+_ELEMENTS = CompiledProfile({"all": sorted({element for structure in _STRUCTURES
+                                            for elements in structure.values() for element in elements})})
+_MAIN_HEADINGS = frozenset(element.lower() for structure in _STRUCTURES for element in structure["main_text"])
+
+_NUMBERS_RE = re.compile(r"\d+")
+
+
+class SectionMap:
+    """Знімок текстів абзаців і межі розділів статті (результат segment_document())."""
+
+    __slots__ = ("texts", "flags", "keywords", "bounds", "affiliation_count", "matches", "headings")
+
+    def __init__(self, texts):
+        self.texts = texts                              # тексти абзаців; етапи оновлюють змінені
+        self.flags = bytearray(len(texts))              # BLANK для порожніх абзаців
+        self.keywords = array("l")                      # індекси рядків «Ключові слова»/«Keywords»
+        self.bounds = array("l", [-1]) * (2 * len(SECTIONS))
+        self.affiliation_count = 1                      # рядків афіліації (за цифрами в авторах)
+        self.matches = {}                               # індекс абзацу → елементи профілів, якими він починається
+        self.headings = []                              # [(індекс, заголовок)] підрозділів основного тексту
+
+    def __len__(self):
+        return len(self.texts)
+
+    def __contains__(self, name):
+        return self.bounds[2 * _SECTION_INDEX[name]] >= 0
+
+    def span(self, name):
+        """(start, end) розділу або None, якщо його не знайдено."""
+        i = 2 * _SECTION_INDEX[name]
+        return (self.bounds[i], self.bounds[i + 1]) if self.bounds[i] >= 0 else None
+
+    def _set(self, name, start, end):
+        i = 2 * _SECTION_INDEX[name]
+        self.bounds[i] = min(start, len(self.texts))
+        self.bounds[i + 1] = min(max(start, end), len(self.texts))
+
+    def keywords_end(self, start):
+        """Індекс після першого рядка «Ключові слова»/«Keywords» від start або кінець документа."""
+        i = bisect_left(self.keywords, start)
+        return self.keywords[i] + 1 if i < len(self.keywords) else len(self.texts)
+
+    def next_nonblank(self, start):
+        """Індекс першого непорожнього абзацу від start або None."""
+        for i in range(start, len(self.flags)):
+            if not self.flags[i] & BLANK:
+                return i
+        return None
+
+    def _match(self, index, stripped_lower):
+        found = _ELEMENTS.match(stripped_lower)
+        if found:
+            self.matches[index] = found
+        else:
+            self.matches.pop(index, None)
+
+    def set_text(self, index, text):
+        """Оновлює знімок після зміни абзацу (межі розділів не перераховуються)."""
+        self.texts[index] = text
+        self._match(index, text.lower().strip())
+
+    def found_elements(self):
+        """Елементи профілів (у нижньому регістрі), з яких починається хоча б один абзац."""
+        return set().union(*self.matches.values())
+
+    def heading_spans(self):
+        """[(заголовок, start, end)] підрозділів основного тексту («вступ», «висновки» тощо)."""
+        _, body_end = self.span("body")
+        ends = [start for start, _ in self.headings[1:]] + [body_end]
+        return [(key, start, end) for (start, key), end in zip(self.headings, ends)]
+
+
+def segment_document(texts):
+    """Один прохід по текстах абзаців → SectionMap."""
+    sections = SectionMap(list(texts))
+    flags, keywords = sections.flags, sections.keywords
+    references_start = references_end = None
+    stop_titles = None
+
+    for i, text in enumerate(sections.texts):
+        text_lower = text.lower()
+        stripped_lower = text_lower.strip()
+        if not stripped_lower:
+            flags[i] = BLANK
+        if "ключові слова" in text_lower or "keywords" in text_lower:
+            keywords.append(i)
+        sections._match(i, stripped_lower)
+        if stop_titles is None:
+            stop_titles = reference_stop_titles(stripped_lower)
+            references_start = i
+        elif references_end is None and stripped_lower and ends_reference_list(stripped_lower, stop_titles):
+            references_end = i
+
+    n = len(sections.texts)
+    if n >= 1: sections._set("udc", 0, 1)
+    if n >= 2: sections._set("title", 1, 2)
+    if n >= 3:
+        sections._set("authors", 2, 3)
+        # Кількість рядків афіліації = найбільша цифра афіліації в рядку авторів
+        numbers = _NUMBERS_RE.findall(sections.texts[2])
+        if numbers and max(int(number) for number in numbers) > 0:
+            sections.affiliation_count = max(int(number) for number in numbers)
+
+    affiliation_end = 3 + sections.affiliation_count
+    sections._set("affiliations", 3, affiliation_end)
+    abstract_end = sections.keywords_end(affiliation_end)
+    sections._set("abstract", affiliation_end, abstract_end)
+    body_start = abstract_end
+
+    # Друга мовна версія: назва й автори — перші непорожні абзаци після анотації
+    title2 = sections.next_nonblank(abstract_end)
+    if title2 is not None:
+        sections._set("title2", title2, title2 + 1)
+        body_start = title2 + 1
+        authors2 = sections.next_nonblank(title2 + 1)
+        if authors2 is not None:
+            sections._set("authors2", authors2, authors2 + 1)
+            affiliation2_end = authors2 + 1 + sections.affiliation_count
+            sections._set("affiliations2", authors2 + 1, affiliation2_end)
+            abstract2_end = sections.keywords_end(affiliation2_end)
+            sections._set("abstract2", affiliation2_end, abstract2_end)
+            body_start = abstract2_end
+
+    if stop_titles is not None:
+        sections._set("references", references_start, n if references_end is None else references_end)
+        sections._set("body", body_start, references_start)
+    else:
+        sections._set("body", body_start, n)
+
+    # Підрозділи основного тексту: абзаци, що починаються із заголовка (найдовшого з можливих)
+    body_start, body_end = sections.span("body")
+    for i, found in sections.matches.items():
+        headings = [key for key in found if key in _MAIN_HEADINGS]
+        if headings and body_start <= i < body_end:
+            sections.headings.append((i, headings[-1]))
+    return sections
@@ -0,0 +1,335 @@
+"""HTTP API форматування для інтеграції із системою подання рукописів.
+
+    python service.py --port 8080 --workers 4
+
+POST /format — тіло запиту: .docx (Content-Type: application/vnd...document)
+або multipart/form-data з полем file. Параметри language, article_type,
+file_name — у query string або полях форми; output=json (за замовчуванням:
+звіт + виправлений файл у base64) або output=zip (fixed_<ім'я>.docx + report.json).
+POST /validate — те саме тіло й параметри, лише перевірка без форматування:
+JSON зі звітом і списком проблем (⚠️/❌), файл не змінюється.
+GET /health — стан сервісу, GET /metrics — метрики у форматі Prometheus.
+
+Сервер асинхронний (asyncio, HTTP/1.1 keep-alive); обробка .docx виконується
+в теплому пулі ізольованих процесів (worker_pool.py), результати кешуються.
+"""
+import argparse
+import asyncio
+import base64
+import email.parser
+import email.policy
+import io
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from cache import ResultCache, cache_lookup, make_key
+from docx_zip import write_results_zip
+from formatter import ARTICLE_TYPES, DOCX_MIME, LANGUAGES, check_document, group_report
+from metrics import MetricsRegistry
+from validate import DocumentTooLarge, validate_document
+from worker_pool import FileTooLarge, ProcessingError, WorkerPool, too_large_message
+
+KEEPALIVE_TIMEOUT = 30
+MAX_HEADERS = 100
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 411: "Length Required",
+            413: "Payload Too Large", 422: "Unprocessable Entity", 500: "Internal Server Error",
+            503: "Service Unavailable"}
+
+log = logging.getLogger(__name__)
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+def _json(status, payload, headers=None):
+    return status, "application/json; charset=utf-8", json.dumps(payload, ensure_ascii=False).encode("utf-8"), headers
+
+
+def _problems(report):
+    """Рядки ⚠️/❌ разом із їхніми підпунктами («   - розділ: елемент»)."""
+    problems, in_problem = [], False
+    for line in report:
+        if line.startswith(("⚠️", "❌")):
+            in_problem = True
+        elif not (in_problem and line.startswith("   - ")):
+            in_problem = False
+            continue
+        problems.append(line)
+    return problems
+
+
+def _parse_multipart(content_type, body):
+    """(поля форми, (ім'я файлу, bytes) або None) з multipart/form-data."""
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        b"Content-Type: " + content_type.encode("latin-1") + b"\r\n\r\n" + body)
+    if not message.is_multipart():
+        raise HTTPError(400, "Некоректне тіло multipart/form-data")
+    fields, upload = {}, None
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        payload = part.get_payload(decode=True) or b""
+        if name == "file":
+            upload = (part.get_filename() or "document.docx", payload)
+        elif name:
+            fields[name] = payload.decode("utf-8")
+    return fields, upload
+
+
+class FormatterService:
+    """Обробники HTTP API; стан (пул, кеш, метрики) живе весь час роботи сервера."""
+
+    def __init__(self, pool, cache=None, metrics=None, max_pending=64):
+        self.pool = pool
+        self.cache = cache
+        self.metrics = metrics or MetricsRegistry()
+        self.max_pending = max_pending
+        self.pending = 0
+        # Потоки лише чекають на воркери пулу та хешують/перевіряють тексти
+        self._executor = ThreadPoolExecutor(max_workers=max_pending, thread_name_prefix="cep-api")
+
+    def process(self, data, file_name, language, article_type):
+        """Синхронна частина запиту (у потоці): кеш → воркер → перевірки."""
+        key = make_key(data)
+        entry = cache_lookup(self.cache, key, file_name) if self.cache is not None else None
+        if entry is not None:
+            fixed, report, texts = entry
+            stages = {}
+            self.metrics.observe_cache_hit()
+        else:
+            fixed, report, texts, stages = self.pool.run(data, file_name=file_name)
+            if self.cache is not None:
+                self.cache.put(key, fixed, report, texts)
+            self.metrics.observe(stages)
+        report = report + check_document(texts, language, article_type)
+        return fixed, report, entry is not None, stages
+
+    def validate(self, data, file_name, language, article_type):
+        """Лише перевірка (у потоці): потоковий розбір тексту без пулу процесів."""
+        started = time.perf_counter()
+        try:
+            report = validate_document(data, language, article_type, file_name=file_name)
+        except DocumentTooLarge as exc:
+            raise FileTooLarge(str(exc))
+        except Exception as exc:
+            raise ProcessingError(f"❌ Помилка обробки: {type(exc).__name__}: {exc}")
+        return report, time.perf_counter() - started
+
+    async def _read_request(self, query, headers, body):
+        """(параметри, ім'я файлу, bytes) із тіла .docx або multipart/form-data."""
+        content_type = headers.get("content-type", "")
+        params = {key: values[0] for key, values in parse_qs(query).items()}
+        if content_type.startswith("multipart/form-data"):
+            fields, upload = await asyncio.get_running_loop().run_in_executor(
+                self._executor, _parse_multipart, content_type, body)
+            if upload is None:
+                raise HTTPError(400, "Немає поля file з .docx")
+            params = {**fields, **params}
+            file_name, data = params.get("file_name", upload[0]), upload[1]
+        else:
+            file_name, data = params.get("file_name", "document.docx"), body
+
+        params.setdefault("language", "uk")
+        params.setdefault("article_type", "original")
+        if params["language"] not in LANGUAGES:
+            raise HTTPError(400, f"Невідома мова: {params['language']} (допустимо: {', '.join(LANGUAGES)})")
+        if params["article_type"] not in ARTICLE_TYPES:
+            raise HTTPError(400, f"Невідомий тип статті: {params['article_type']} "
+                                 f"(допустимо: {', '.join(ARTICLE_TYPES)})")
+        if not data:
+            raise HTTPError(400, "Порожній файл")
+        return params, file_name, data
+
+    async def _run(self, function, *args):
+        """function(*args) у потоці з обмеженням кількості запитів в обробці."""
+        if self.pending >= self.max_pending:
+            raise HTTPError(503, "Сервіс перевантажений, спробуйте пізніше", {"Retry-After": "5"})
+        self.pending += 1
+        try:
+            return await asyncio.wrap_future(self._executor.submit(function, *args))
+        except FileTooLarge as exc:
+            raise HTTPError(413, str(exc))
+        except ProcessingError as exc:
+            raise HTTPError(422, str(exc))
+        finally:
+            self.pending -= 1
+
+    async def handle_format(self, query, headers, body):
+        params, file_name, data = await self._read_request(query, headers, body)
+        language, article_type = params["language"], params["article_type"]
+        output = params.get("output", "json")
+        if output not in ("json", "zip"):
+            raise HTTPError(400, f"Невідомий формат відповіді: {output} (допустимо: json, zip)")
+
+        fixed, report, from_cache, stages = await self._run(self.process, data, file_name, language, article_type)
+
+        if output == "zip":
+            archive = write_results_zip(io.BytesIO(), [(f"fixed_{file_name}", fixed)],
+                                        [("report.json", json.dumps(report, ensure_ascii=False, indent=2))])
+            return 200, "application/zip", archive.getvalue(), {"Content-Disposition": 'attachment; filename="fixed.zip"'}
+        return _json(200, {
+            "file_name": file_name,
+            "language": language,
+            "article_type": article_type,
+            "from_cache": from_cache,
+            "processing_s": sum(stage["wall_s"] for stage in stages.values()),
+            "report": report,
+            "sections": group_report(report),
+            "problems": _problems(report),
+            "fixed_file_name": f"fixed_{file_name}",
+            "fixed_file_mime": DOCX_MIME,
+            "fixed_file": base64.b64encode(fixed).decode("ascii"),
+        })
+
+    async def handle_validate(self, query, headers, body):
+        params, file_name, data = await self._read_request(query, headers, body)
+        if self.pool.max_upload_bytes is not None and len(data) > self.pool.max_upload_bytes:
+            raise HTTPError(413, too_large_message(len(data), self.pool.max_upload_bytes))
+        report, elapsed = await self._run(self.validate, data, file_name, params["language"], params["article_type"])
+        return _json(200, {
+            "file_name": file_name,
+            "language": params["language"],
+            "article_type": params["article_type"],
+            "processing_s": elapsed,
+            "report": report,
+            "sections": group_report(report),
+            "problems": _problems(report),
+        })
+
+    async def dispatch(self, method, target, headers, body):
+        url = urlsplit(target)
+        handler = {"/format": self.handle_format, "/validate": self.handle_validate}.get(url.path)
+        if handler is not None:
+            if method != "POST":
+                raise HTTPError(405, "Використовуйте POST", {"Allow": "POST"})
+            return await handler(url.query, headers, body)
+        if url.path == "/health" and method == "GET":
+            return _json(200, {"status": "ok", "workers": self.pool.size, "pending": self.pending,
+                               "worker_restarts": self.pool.restarts})
+        if url.path == "/metrics" and method == "GET":
+            return 200, "text/plain; version=0.0.4", self.metrics.render_prometheus().encode("utf-8"), None
+        raise HTTPError(404, "Невідомий шлях")
+
+    # ---- HTTP/1.1 поверх asyncio streams ----
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), KEEPALIVE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line:
+                    break
+                keep_alive = True
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                    headers = await self._read_headers(reader)
+                    if version == "HTTP/1.0":
+                        keep_alive = headers.get("connection", "").lower() == "keep-alive"
+                    elif headers.get("connection", "").lower() == "close":
+                        keep_alive = False
+                    length = self._content_length(headers)
+                    # curl та інші клієнти для великих тіл чекають на «100 Continue»
+                    # (інакше ~1 с простою); після 413 вище тіло не читається
+                    if length and headers.get("expect", "").lower() == "100-continue" and version != "HTTP/1.0":
+                        writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+                        await writer.drain()
+                    body = await reader.readexactly(length) if length else b""
+                    status, content_type, payload, extra = await self.dispatch(method, target, headers, body)
+                except HTTPError as exc:
+                    status, content_type, payload, extra = _json(exc.status, {"error": str(exc)}, exc.headers)
+                    # Тіло запиту могло лишитися непрочитаним: з'єднання далі не використовується
+                    keep_alive = keep_alive and exc.status not in (400, 411, 413)
+                except (ValueError, asyncio.LimitOverrunError):
+                    status, content_type, payload, extra = _json(400, {"error": "Некоректний HTTP-запит"})
+                    keep_alive = False
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    raise
+                except Exception:
+                    log.exception("Помилка обробки запиту %s", request_line[:200])
+                    status, content_type, payload, extra = _json(500, {"error": "Внутрішня помилка сервера"})
+                    keep_alive = False
+                self._write_response(writer, status, content_type, payload, extra, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_headers(self, reader):
+        headers = {}
+        for _ in range(MAX_HEADERS):
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                return headers
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        raise HTTPError(400, "Забагато заголовків")
+
+    def _content_length(self, headers):
+        """Довжина тіла запиту (перевіряється до читання тіла)."""
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HTTPError(411, "Потрібен заголовок Content-Length")
+        length = int(headers.get("content-length", "0"))
+        if length < 0:
+            raise HTTPError(400, "Некоректний Content-Length")
+        # Запас на multipart-обгортку понад ліміт розміру файлу
+        if self.pool.max_upload_bytes is not None and length > self.pool.max_upload_bytes + 64 * 1024:
+            raise HTTPError(413, too_large_message(length, self.pool.max_upload_bytes))
+        return length
+
+    @staticmethod
+    def _write_response(writer, status, content_type, payload, extra, keep_alive):
+        lines = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+                 f"Content-Type: {content_type}",
+                 f"Content-Length: {len(payload)}",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        lines += [f"{name}: {value}" for name, value in (extra or {}).items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + payload)
+
+
+async def serve(service, host="127.0.0.1", port=8080):
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    print(f"CEP formatter API: http://{host}:{port} (воркерів: {service.pool.size})")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP API форматування статей")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 2, help="процесів-воркерів")
+    parser.add_argument("--max-pending", type=int, default=64, help="запитів в обробці одночасно (далі — 503)")
+    parser.add_argument("--max-upload-mb", type=float, default=50)
+    parser.add_argument("--timeout", type=float, default=120, help="ліміт часу на файл, с")
+    parser.add_argument("--max-rss-mb", type=float, default=1024, help="ліміт пам'яті воркера, МБ")
+    parser.add_argument("--cache-mb", type=float, default=256, help="кеш результатів у пам'яті; 0 — вимкнено")
+    args = parser.parse_args(argv)
+
+    pool = WorkerPool(workers=args.workers, max_upload_bytes=int(args.max_upload_mb * 1024 * 1024),
+                      timeout=args.timeout, max_rss_bytes=int(args.max_rss_mb * 1024 * 1024))
+    cache = ResultCache(max_bytes=int(args.cache_mb * 1024 * 1024)) if args.cache_mb > 0 else None
+    service = FormatterService(pool, cache, max_pending=args.max_pending)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import io
+import zipfile
+
+import pytest
+from docx import Document
+
+from benchmarks.synthetic import make_manuscript
+from formatter import ARTICLE_TYPES, LANGUAGES, format_document, process_document
+
+# Швидкі шляхи (text_format="xml", save_mode="passthrough") мають давати той
+# самий файл і той самий звіт, що й повільні через python-docx.
+MANUSCRIPTS = {
+    "bilingual": dict(paragraphs=40, references=10, seed=1),
+    "images_tables": dict(paragraphs=40, references=10, images=1, tables=1, seed=2),
+    "english_only": dict(paragraphs=30, references=3, bilingual=False, language="en", seed=3),
+    "long_runs": dict(paragraphs=60, runs_per_paragraph=8, references=40, affiliations=3, seed=4),
+}
+
+
+@pytest.fixture(scope="module", params=sorted(MANUSCRIPTS))
+def manuscript(request):
+    return make_manuscript(**MANUSCRIPTS[request.param])
+
+
+def _parts(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as z:
+        return {name: z.read(name) for name in z.namelist()}
+
+
+def test_xml_text_format_matches_docx(manuscript):
+    fast, fast_report, fast_texts = format_document(manuscript, text_format="xml")
+    slow, slow_report, slow_texts = format_document(manuscript, text_format="docx")
+    assert _parts(fast) == _parts(slow)
+    assert fast_report == slow_report
+    assert fast_texts == slow_texts
+
+
+def test_passthrough_save_matches_docx(manuscript):
+    fast, fast_report, _ = format_document(manuscript, save_mode="passthrough")
+    slow, slow_report, _ = format_document(manuscript, save_mode="docx")
+    assert _parts(fast) == _parts(slow)
+    assert fast_report == slow_report
+
+
+def test_texts_match_saved_document(manuscript):
+    fixed, _, texts = format_document(manuscript)
+    assert texts == [p.text for p in Document(io.BytesIO(fixed)).paragraphs]
+
+
+@pytest.mark.parametrize("language", LANGUAGES)
+@pytest.mark.parametrize("article_type", ARTICLE_TYPES)
+def test_process_document_modes_agree(manuscript, language, article_type):
+    fast, fast_report = process_document(manuscript, language, article_type)
+    slow, slow_report = process_document(manuscript, language, article_type, text_format="docx", save_mode="docx")
+    assert _parts(fast)["word/document.xml"] == _parts(slow)["word/document.xml"]
+    assert fast_report == slow_report
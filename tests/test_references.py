@@ -0,0 +1,83 @@
+import pytest
+
+from references import MAX_CITATION_RANGE, analyze_references, normalize_reference
+from segments import segment_document
+
+
+def analyze(body, references, tail=()):
+    texts = ["УДК 616", "НАЗВА", "I. Ivanenko", *body, "Список літератури", *references, *tail]
+    return analyze_references(texts, segment_document(texts).span("references"))
+
+
+REFERENCES = [f"{n}. Ivanenko{n} I. Study {n}. Journal. 2020;{n}:1-5." for n in range(1, 6)]
+
+
+def test_no_reference_list():
+    texts = ["УДК 616", "НАЗВА", "Текст [1]."]
+    assert segment_document(texts).span("references") is None
+
+
+def test_entries_and_numbering():
+    refs = analyze(["Текст [1-5]."], REFERENCES)
+    assert refs.title == "Список літератури"
+    assert refs.count == 5
+    assert not refs.numbering_errors
+    assert refs.missing_year == [] and not refs.vancouver_errors
+
+
+def test_numbering_errors_and_missing_year():
+    refs = analyze([], ["1. A. 2020.", "3. B. 2019.", "C. без року."])
+    assert refs.numbering_errors
+    assert refs.missing_year == [3]
+
+
+def test_list_ends_at_stop_title_and_contacts():
+    refs = analyze([], REFERENCES[:2], ["References", "1. English list. 2020."])
+    assert refs.count == 2
+    refs = analyze([], REFERENCES[:2], ["Адреса для кореспонденції: вул. Театральна, 2"])
+    assert refs.count == 2
+
+
+@pytest.mark.parametrize("dash", ["-", "–", "—"])
+def test_citation_ranges(dash):
+    refs = analyze([f"Дані [1{dash}3] і [5]."], REFERENCES)
+    assert sorted(refs.citations) == [1, 2, 3, 5]
+    assert refs.uncited == [4]
+    assert refs.missing_citations == []
+
+
+def test_citation_lists_and_first_paragraph():
+    refs = analyze(["Вступ [2].", "Методи [1, 2; 4 - 5]."], REFERENCES)
+    assert refs.citations == {2: 3, 1: 4, 4: 4, 5: 4}
+    assert refs.uncited == [3]
+
+
+def test_missing_citations():
+    refs = analyze(["Дані [1-5], [7], [0]."], REFERENCES)
+    assert refs.missing_citations == [0, 7]
+
+
+def test_bracketed_years_are_not_citations():
+    refs = analyze(["Дані ВООЗ [2019] показують [1-5].", "Період [2018–2020], джерела [2, 2021]."], REFERENCES)
+    assert refs.missing_citations == []
+    assert sorted(refs.citations) == [1, 2, 3, 4, 5]
+
+
+def test_citations_after_list_are_ignored():
+    refs = analyze(["Текст [1]."], REFERENCES, ["References", "Text [9]."])
+    assert refs.missing_citations == []
+
+
+def test_huge_range_is_not_expanded():
+    refs = analyze([f"Дані [1-{MAX_CITATION_RANGE + 10}]."], REFERENCES)
+    assert sorted(refs.citations) == [1, MAX_CITATION_RANGE + 10]
+
+
+def test_duplicates_ignore_number_case_punctuation_and_diacritics():
+    refs = analyze([], ["1. Müller K. Cells, tissue. 2020.", "2. Other. 2019.", "3) muller k cells tissue 2020",
+                        "4. Other. 2019."])
+    assert refs.duplicates == [(1, 3), (2, 4)]
+
+
+def test_normalize_reference():
+    assert normalize_reference(" 12. Müller K.; Cells—2020 ") == "muller k cells 2020"
@@ -0,0 +1,148 @@
+import io
+import random
+import re
+
+import pytest
+
+from benchmarks.synthetic import make_manuscript
+from formatter import format_authors
+from profiles import JOURNAL_PROFILES, get_profile
+from references import REFERENCE_TITLES, _CONTACT_RE
+from segments import segment_document
+from validate import read_paragraph_texts
+
+
+# ------------------------------------------------------------
+# Попередня логіка: окремі сканування абзаців для кожного етапу
+# ------------------------------------------------------------
+def _find_keywords_end(texts, start):
+    for i in range(start, len(texts)):
+        text_lower = texts[i].lower()
+        if "ключові слова" in text_lower or "keywords" in text_lower:
+            return i + 1
+    return len(texts)
+
+
+def _next_nonblank(texts, start):
+    while start < len(texts) and not texts[start].strip():
+        start += 1
+    return start if start < len(texts) else None
+
+
+def _reference_span(texts):
+    stop_titles = None
+    for i, raw in enumerate(texts):
+        text_lower = raw.strip().lower()
+        if stop_titles is None:
+            title = next((t for t in REFERENCE_TITLES if text_lower.startswith(t)), None)
+            if title is not None:
+                start, stop_titles = i, REFERENCE_TITLES[title]
+        elif text_lower and (text_lower.startswith(stop_titles) or _CONTACT_RE.search(text_lower)):
+            return start, i
+    return (start, len(texts)) if stop_titles is not None else None
+
+
+def old_spans(texts):
+    """Межі, які знаходили fix_header_block(), fix_second_language() і analyze_references()."""
+    # Афіліації рахувалися вже за переписаним рядком авторів
+    authors = format_authors(texts[2]) if len(texts) >= 3 else ""
+    numbers = [int(n) for n in re.findall(r"\d+", authors)]
+    affiliation_count = max(numbers) if numbers and max(numbers) > 0 else 1
+    abstract_end = _find_keywords_end(texts, 3 + affiliation_count)
+    spans = {"abstract_end": abstract_end, "affiliation_count": affiliation_count,
+             "title2": None, "authors2": None, "abstract2_end": None}
+    title2 = _next_nonblank(texts, abstract_end)
+    if title2 is not None:
+        spans["title2"] = title2
+        authors2 = _next_nonblank(texts, title2 + 1)
+        if authors2 is not None:
+            spans["authors2"] = authors2
+            spans["abstract2_end"] = _find_keywords_end(texts, authors2 + 1 + affiliation_count)
+    spans["references"] = _reference_span(texts)
+    return spans
+
+
+def new_spans(texts):
+    sections = segment_document(texts)
+
+    def start(name):
+        span = sections.span(name)
+        return span and span[0]
+
+    return {
+        "abstract_end": sections.span("abstract")[1],
+        "affiliation_count": sections.affiliation_count,
+        "title2": start("title2"),
+        "authors2": start("authors2"),
+        "abstract2_end": sections.span("abstract2") and sections.span("abstract2")[1],
+        "references": sections.span("references"),
+    }
+
+
+# ------------------------------------------------------------
+# Випадкові документи з крайніми випадками
+# ------------------------------------------------------------
+LINES = ("", "   ", "Ключові слова: морфологія", "KEYWORDS: morphology", "Список літератури", "References",
+         "REFERENCES:", "Відомості про авторів", "Information about authors", "Contact e-mail: a@b.c",
+         "Адреса для кореспонденції", "1. Ivanenko I. Study. 2020;1:1-5.", "2) Smith J. Cells. 1999.",
+         "Результати дослідження [1, 3-5].", "Ivanenko I.1, Petrenko P.2,3", "I. Ivanenko 0", "Вступ", "Висновки",
+         "  МЕТА РОБОТИ", "Матеріал і методи дослідження.", "Результати та їх обговорення", "Objective: x",
+         "Introduction", "Мета\nроботи", "Висновки та перспективи")
+
+
+def random_texts(rng):
+    return [rng.choice(LINES) for _ in range(rng.randrange(0, 40))]
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_segmenter_matches_old_scans(seed):
+    texts = random_texts(random.Random(seed))
+    assert new_spans(texts) == old_spans(texts)
+
+
+@pytest.mark.parametrize("kwargs", [
+    dict(paragraphs=40, references=10, seed=1),
+    dict(paragraphs=30, references=3, bilingual=False, language="en", seed=3),
+    dict(paragraphs=60, references=40, affiliations=3, seed=4),
+])
+def test_segmenter_matches_old_scans_on_manuscripts(kwargs):
+    texts = read_paragraph_texts(io.BytesIO(make_manuscript(**kwargs)))
+    assert new_spans(texts) == old_spans(texts)
+
+
+def test_texts_are_copied():
+    texts = ["УДК 616", "Назва"]
+    sections = segment_document(texts)
+    sections.texts[0] = "змінено"
+    assert texts[0] == "УДК 616"
+
+
+PROFILES = [(journal, language, article_type) for journal, languages in JOURNAL_PROFILES.items()
+            for language, types in languages.items() for article_type in types]
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_found_elements_match_profile_scan(seed):
+    texts = random_texts(random.Random(seed))
+    sections = segment_document(texts)
+    # Зміна абзацу після сегментації (як при переписуванні заголовка) оновлює збіги
+    if len(texts) > 1:
+        sections.set_text(1, "Мета роботи")
+    for journal, language, article_type in PROFILES:
+        profile = get_profile(language, article_type, journal)
+        assert profile.missing(sections.found_elements()) == profile.find_missing(sections.texts)
+
+
+def test_heading_spans():
+    header = ["УДК 616", "НАЗВА", "I. Ivanenko", "Афіліація", "Анотація. Висновки", "Ключові слова: x",
+              "TITLE", "I. Ivanenko", "Affiliation", "Abstract. Conclusions", "Keywords: x"]
+    texts = header + ["Вступ", "Текст", "", "Мета роботи", "Матеріал і методи дослідження", "Текст", "Текст",
+                      "Висновки", "Текст", "Список літератури", "1. Ivanenko I. 2020.", "Висновки"]
+    sections = segment_document(texts)
+    assert sections.span("body") == (11, 20)
+    assert sections.heading_spans() == [("вступ", 11, 14), ("мета роботи", 14, 15),
+                                        ("матеріал і методи дослідження", 15, 18), ("висновки", 18, 20)]
+
+
+def test_heading_spans_without_headings():
+    assert segment_document(["УДК 616", "НАЗВА", "Автори", "Текст"]).heading_spans() == []
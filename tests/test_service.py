@@ -0,0 +1,77 @@
+import asyncio
+import time
+import types
+
+import pytest
+
+from benchmarks.loadtest import _request
+from benchmarks.synthetic import make_manuscript
+from formatter import DOCX_MIME
+from service import FormatterService
+
+# /validate працює в потоці сервісу, тож пул процесів тут не потрібен
+MAX_UPLOAD = 1024 * 1024
+
+
+async def _with_server(client):
+    pool = types.SimpleNamespace(max_upload_bytes=MAX_UPLOAD, size=0, restarts=0)
+    server = await asyncio.start_server(FormatterService(pool).handle_connection, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        return await client(reader, writer, port)
+    finally:
+        writer.close()
+        server.close()
+        await server.wait_closed()
+
+
+def _head(length):
+    return (f"POST /validate HTTP/1.1\r\nHost: test\r\nContent-Type: {DOCX_MIME}\r\n"
+            f"Content-Length: {length}\r\nExpect: 100-continue\r\n\r\n").encode("latin-1")
+
+
+@pytest.fixture(scope="module")
+def manuscript():
+    return make_manuscript(paragraphs=30, references=5)
+
+
+def test_expect_continue_is_answered_before_body(manuscript):
+    async def client(reader, writer, port):
+        writer.write(_head(len(manuscript)))
+        await writer.drain()
+        interim = await asyncio.wait_for(reader.readline(), 0.5)
+        assert await reader.readline() == b"\r\n"
+        writer.write(manuscript)
+        await writer.drain()
+        return interim, await reader.readline()
+
+    interim, final = asyncio.run(_with_server(client))
+    assert interim.split()[1] == b"100"
+    assert final.split()[1] == b"200"
+
+
+def test_expect_continue_too_large_is_rejected_without_body():
+    async def client(reader, writer, port):
+        writer.write(_head(MAX_UPLOAD * 2))
+        await writer.drain()
+        status = await asyncio.wait_for(reader.readline(), 0.5)
+        headers = []
+        while (line := await reader.readline()) not in (b"\r\n", b""):
+            headers.append(line.lower())
+        return status, headers
+
+    status, headers = asyncio.run(_with_server(client))
+    assert status.split()[1] == b"413"
+    assert b"connection: close\r\n" in headers
+
+
+def test_loadtest_client_does_not_wait_for_timeout(manuscript):
+    async def client(reader, writer, port):
+        started = time.perf_counter()
+        status, keep_alive = await _request(reader, writer, "test", "/validate", manuscript, expect="always")
+        return status, keep_alive, time.perf_counter() - started
+
+    status, keep_alive, elapsed = asyncio.run(_with_server(client))
+    assert (status, keep_alive) == (200, True)
+    assert elapsed < 0.9
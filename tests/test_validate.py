@@ -0,0 +1,91 @@
+import io
+
+import pytest
+from docx import Document
+from docx.enum.text import WD_BREAK
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+
+from benchmarks.synthetic import make_manuscript
+from formatter import ARTICLE_TYPES, LANGUAGES, format_document, process_document
+from validate import scan_document, validate_document
+
+# Лише перевірка обіцяє ті самі ⚠️/❌ (з підпунктами «   - »), що й повна обробка
+
+
+def _problems(report):
+    return [line for line in report if line.startswith(("⚠️", "❌", "   - "))]
+
+
+def _run(text):
+    run = OxmlElement("w:r")
+    t = OxmlElement("w:t")
+    t.set(qn("xml:space"), "preserve")
+    t.text = text
+    run.append(t)
+    return run
+
+
+def _with_text_cases(data):
+    """Рукопис, у якому заголовки, автори й джерела зібрані з w:hyperlink, w:tab, w:br тощо."""
+    doc = Document(io.BytesIO(data))
+    paragraphs = doc.paragraphs
+    # Назва з розривом рядка, автори з табуляцією
+    paragraphs[1].runs[0].add_break()
+    paragraphs[1].add_run("продовження назви")
+    paragraphs[2].runs[0].add_tab()
+    for paragraph in paragraphs:
+        text = paragraph.text
+        if text in ("Вступ", "Introduction"):
+            # Заголовок усередині гіперпосилання, розбитий на два фрагменти
+            for run in paragraph.runs:
+                run._r.getparent().remove(run._r)
+            hyperlink = OxmlElement("w:hyperlink")
+            hyperlink.append(_run(text[:3]))
+            hyperlink.append(_run(text[3:]))
+            paragraph._p.append(hyperlink)
+        elif text.startswith("1."):
+            # Джерело з табуляцією, розривами рядка й сторінки (останній — не текст),
+            # нерозривним дефісом і URL-гіперпосиланням
+            run = paragraph.runs[0]
+            run.add_tab()
+            run.add_break()
+            run.add_break(WD_BREAK.PAGE)
+            run._r.append(OxmlElement("w:noBreakHyphen"))
+            hyperlink = OxmlElement("w:hyperlink")
+            hyperlink.append(_run(" https://doi.org/10.1000/1"))
+            paragraph._p.append(hyperlink)
+    # Таблиця з «заголовком» не є абзацом верхнього рівня
+    doc.add_table(rows=1, cols=1).cell(0, 0).text = "Висновки"
+    out = io.BytesIO()
+    doc.save(out)
+    return out.getvalue()
+
+
+MANUSCRIPTS = {
+    "bilingual": dict(paragraphs=40, references=10, seed=1),
+    "images_tables": dict(paragraphs=40, references=20, images=1, tables=1, seed=2),
+    "english_only": dict(paragraphs=30, references=3, bilingual=False, language="en", seed=3),
+    "english": dict(paragraphs=30, references=60, language="en", affiliations=3, seed=5),
+    "short_abstract": dict(paragraphs=20, references=5, abstract_chars=500, seed=6),
+}
+
+
+@pytest.fixture(scope="module", params=[(name, cases) for name in sorted(MANUSCRIPTS) for cases in (False, True)],
+                ids=lambda param: param[0] + ("-text_cases" if param[1] else ""))
+def manuscript(request):
+    name, cases = request.param
+    data = make_manuscript(**MANUSCRIPTS[name])
+    return _with_text_cases(data) if cases else data
+
+
+def test_scan_texts_match_format_document(manuscript):
+    _, texts = scan_document(manuscript)
+    assert texts == format_document(manuscript)[2]
+
+
+@pytest.mark.parametrize("language", LANGUAGES)
+@pytest.mark.parametrize("article_type", ARTICLE_TYPES)
+def test_validate_problems_match_process_document(manuscript, language, article_type):
+    _, report = process_document(manuscript, language, article_type)
+    assert _problems(validate_document(manuscript, language, article_type)) == _problems(report)
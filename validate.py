@@ -0,0 +1,159 @@
+import io
+import posixpath
+import zipfile
+
+from lxml import etree
+
+from formatter import UDC_PLACEHOLDER, check_abstract_length, check_document, format_authors, format_title, no_timer
+from profiles import DEFAULT_JOURNAL
+from segments import segment_document
+
+# ============================================================
+# ЛИШЕ ПЕРЕВІРКА (без форматування та збереження)
+# ============================================================
+# Для перевірки потрібні тільки тексти абзаців. Замість Document() (повна
+# модель python-docx, усі частини пакета) word/document.xml читається
+# потоково з архіву: кожен абзац верхнього рівня перетворюється на текст за
+# тими ж правилами, що й paragraph.text, і одразу звільняється. Заголовок
+# статті переписується в пам'яті так само, як це робить форматування, тож
+# попередження й ❌ у звіті збігаються зі звітом process_document().
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+W_BODY, W_P, W_R, W_HYPERLINK = _W + "body", _W + "p", _W + "r", _W + "hyperlink"
+W_T, W_BR, W_TYPE = _W + "t", _W + "br", _W + "type"
+
+# Вміст w:r, що має текстовий відповідник (як у python-docx); w:t і w:br — окремо
+_RUN_CHARS = {_W + "tab": "\t", _W + "ptab": "\t", _W + "cr": "\n", _W + "noBreakHyphen": "-"}
+
+_OFFICE_DOCUMENT = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+_RELATIONSHIP = "{http://schemas.openxmlformats.org/package/2006/relationships}Relationship"
+
+# Ліміт розпакованого word/document.xml: розбір іде в процесі застосунку без
+# пулу й тайм-аутів, тож «zip-бомба» з малим .docx не повинна його займати.
+# ZipExtFile не віддає більше, ніж заявлено в ZipInfo.file_size, тому
+# перевірки заголовка архіву достатньо.
+MAX_XML_BYTES = 100 * 1024 * 1024
+
+
+class DocumentTooLarge(ValueError):
+    """Розпакований текст документа перевищує ліміт; повідомлення — рядок звіту."""
+
+
+def _main_part_name(zin):
+    """Ім'я основної частини документа в архіві (за _rels/.rels)."""
+    rels = etree.fromstring(zin.read("_rels/.rels"))
+    for rel in rels.iterchildren(_RELATIONSHIP):
+        if rel.get("Type") == _OFFICE_DOCUMENT:
+            return posixpath.normpath(rel.get("Target").lstrip("/"))
+    raise ValueError("У пакеті немає основного документа")
+
+
+def _run_text(r):
+    parts = []
+    for child in r:
+        tag = child.tag
+        if tag == W_T:
+            parts.append(child.text or "")
+        elif tag == W_BR:
+            if child.get(W_TYPE, "textWrapping") == "textWrapping": parts.append("\n")
+        elif tag in _RUN_CHARS:
+            parts.append(_RUN_CHARS[tag])
+    return "".join(parts)
+
+
+def paragraph_text(p):
+    """Текст елемента w:p — те саме, що Paragraph.text у python-docx."""
+    parts = []
+    for child in p:
+        if child.tag == W_R:
+            parts.append(_run_text(child))
+        elif child.tag == W_HYPERLINK:
+            parts.extend(_run_text(r) for r in child.iterchildren(W_R))
+    return "".join(parts)
+
+
+def read_paragraph_texts(source, max_xml_bytes=MAX_XML_BYTES):
+    """Тексти абзаців верхнього рівня (як [p.text for p in doc.paragraphs]).
+
+    source — шлях або двійковий file-like .docx. Документ розбирається
+    потоково: у пам'яті одночасно лише поточний абзац (чи таблиця).
+    Якщо розпакована основна частина більша за max_xml_bytes — DocumentTooLarge.
+    """
+    texts = []
+    with zipfile.ZipFile(source) as zin:
+        info = zin.getinfo(_main_part_name(zin))
+        if max_xml_bytes is not None and info.file_size > max_xml_bytes:
+            raise DocumentTooLarge(f"❌ Текст документа завеликий: {info.file_size / 1024 / 1024:.1f} МБ "
+                                   f"після розпакування (максимум {max_xml_bytes / 1024 / 1024:.0f} МБ)")
+        with zin.open(info) as xml:
+            # Параметри розбору — як у python-docx (oxml_parser)
+            for _, p in etree.iterparse(xml, events=("end",), tag=W_P, remove_blank_text=True, resolve_entities=False):
+                body = p.getparent()
+                if body is None or body.tag != W_BODY:
+                    continue        # абзаци таблиць, написів тощо звільняються разом із батьківським елементом
+                texts.append(paragraph_text(p))
+                p.clear()
+                while p.getprevious() is not None:
+                    del body[0]
+    return texts
+
+
+def _rewrite_header(sections):
+    """Тексти, які fix_header_block() і fix_second_language() записують у документ."""
+    texts = sections.texts
+
+    def put(index, text):
+        sections.set_text(index, text.replace("\r", "\n"))     # python-docx записує \r як розрив рядка
+
+    if "udc" in sections and not texts[0].startswith("УДК"):
+        put(0, UDC_PLACEHOLDER)
+    if "title" in sections:
+        put(1, format_title(texts[1]))
+        if "authors" in sections:
+            put(2, format_authors(texts[2]))
+    if "title2" in sections:
+        title2_index, _ = sections.span("title2")
+        put(title2_index, format_title(texts[title2_index]))
+        if "authors2" in sections:
+            authors2_index, _ = sections.span("authors2")
+            put(authors2_index, format_authors(texts[authors2_index]))
+
+
+def scan_document(data, file_name="document.docx", stage_timer=None):
+    """Аналог format_document() без змін у файлі: повертає (звіт, тексти абзаців).
+
+    Тексти — ті самі, що повернуло б форматування, тож їх можна передати в
+    check_document() для будь-якої мови й типу статті.
+    """
+    report, sections = _scan_document(data, file_name, stage_timer)
+    return report, sections.texts
+
+
+def _scan_document(data, file_name, stage_timer):
+    """scan_document(), що повертає SectionMap замість текстів."""
+    stage = stage_timer or no_timer
+    report = []
+
+    with stage("load"):
+        source = io.BytesIO(data) if isinstance(data, (bytes, bytearray, memoryview)) else data
+        if hasattr(source, "seek"):
+            source.seek(0)
+        texts = read_paragraph_texts(source)
+    report.append("Файл завантажено: " + file_name)
+
+    with stage("segment"):
+        sections = segment_document(texts)
+    with stage("header"):
+        check_abstract_length(sections, report)
+        _rewrite_header(sections)
+    return report, sections
+
+
+def validate_document(data, language="uk", article_type="original", file_name="document.docx",
+                      journal=DEFAULT_JOURNAL, stage_timer=None):
+    """Лише перевірка .docx: звіт з тими самими попередженнями та ❌, що й у process_document().
+
+    Файл відкривається тільки для читання, виправлена копія не створюється.
+    """
+    report, sections = _scan_document(data, file_name, stage_timer)
+    return report + check_document(sections, language, article_type, journal, stage_timer)
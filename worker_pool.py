@@ -0,0 +1,255 @@
+import multiprocessing
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import types
+
+from metrics import format_document_measured
+
+# ============================================================
+# ІЗОЛЬОВАНА ОБРОБКА В ТЕПЛОМУ ПУЛІ ПРОЦЕСІВ
+# ============================================================
+# Форматування виконується не в процесі Streamlit, а в окремих процесах-
+# воркерах, які стартують один раз і чекають завдань. Вхідний файл
+# записується шматками у тимчасовий файл (spool) і передається шляхом, результат
+# воркер пише в інший тимчасовий файл. Поки воркер працює, батьківський процес
+# стежить за часом і RSS воркера; при перевищенні лімітів процес знищується,
+# а на його місце одразу запускається новий.
+
+COPY_CHUNK = 1024 * 1024
+POLL_INTERVAL = 0.05
+
+# Після файлу воркер із таким RSS (частка ліміту) перезапускається,
+# щоб наступний файл не починав із роздутої купи
+RECYCLE_RSS_FRACTION = 0.75
+
+# spawn виконує головний модуль батьківського процесу в кожному дочірньому; під
+# `streamlit run` це app.py, тож на час старту воркера підставляється порожній модуль
+_BARE_MAIN = types.ModuleType("__main__")
+_START_LOCK = threading.Lock()
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+
+class ProcessingError(Exception):
+    """Файл не оброблено; повідомлення — готовий рядок звіту."""
+
+
+class FileTooLarge(ProcessingError):
+    pass
+
+
+def too_large_message(size, max_bytes):
+    """Рядок звіту для файлу понад ліміт розміру."""
+    return f"❌ Файл завеликий: {size / 1024 / 1024:.1f} МБ (максимум {max_bytes / 1024 / 1024:.0f} МБ)"
+
+
+class ProcessingTimeout(ProcessingError):
+    pass
+
+
+class MemoryLimitExceeded(ProcessingError):
+    pass
+
+
+def _rss_bytes(pid):
+    """RSS процесу з /proc (Linux); None, якщо недоступно."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _source_size(source):
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return len(source)
+    position = source.tell()
+    size = source.seek(0, os.SEEK_END)
+    source.seek(position)
+    return size
+
+
+def _spool(source, directory):
+    """Копіює вхідний файл шматками у тимчасовий файл; повертає шлях."""
+    fd, path = tempfile.mkstemp(dir=directory, suffix=".docx")
+    with os.fdopen(fd, "wb") as f:
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            f.write(source)
+        else:
+            source.seek(0)
+            shutil.copyfileobj(source, f, COPY_CHUNK)
+            source.seek(0)
+    return path
+
+
+def _start_process(process):
+    with _START_LOCK:
+        main = sys.modules.get("__main__")
+        sys.modules["__main__"] = _BARE_MAIN
+        try:
+            process.start()
+        finally:
+            if sys.modules.get("__main__") is _BARE_MAIN:
+                sys.modules["__main__"] = main
+
+
+def _worker_main(conn):
+    """Цикл воркера: (вхідний шлях, вихідний шлях, параметри) → результат у conn."""
+    # alloc_bytes/peak_bytes у StageMetrics — лише з tracemalloc у цьому процесі
+    if os.environ.get("CEP_TRACE_MEMORY") == "1":
+        tracemalloc.start()
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        input_path, output_path, kwargs = task
+        try:
+            with open(input_path, "rb") as source, open(output_path, "wb") as out:
+                _, report, texts, stages = format_document_measured(source, out=out, **kwargs)
+            conn.send(("ok", report, texts, stages))
+        except MemoryError:
+            conn.send(("memory", None, None, None))
+        except Exception as exc:
+            conn.send(("error", f"{type(exc).__name__}: {exc}", None, None))
+
+
+class _Worker:
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        _start_process(self.process)
+        child_conn.close()
+
+    def rss(self):
+        return _rss_bytes(self.process.pid)
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.kill()
+
+
+class WorkerPool:
+    """Теплий пул ізольованих процесів із лімітами на розмір файлу, час і пам'ять.
+
+    max_upload_bytes — найбільший вхідний файл; timeout — секунд на файл;
+    max_rss_bytes — RSS воркера (перевіряється через /proc, тобто лише на Linux).
+    None вимикає відповідний ліміт. spool_dir — каталог для тимчасових файлів.
+    """
+
+    def __init__(self, workers=2, max_upload_bytes=None, timeout=None, max_rss_bytes=None, spool_dir=None):
+        self.size = workers
+        self.max_upload_bytes = max_upload_bytes
+        self.timeout = timeout
+        self.max_rss_bytes = max_rss_bytes
+        self.spool_dir = spool_dir
+        self.restarts = 0
+        self._context = multiprocessing.get_context("spawn")
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers = set()
+        for _ in range(workers):
+            self._release(self._start_worker())
+
+    def _start_worker(self):
+        worker = _Worker(self._context)
+        with self._lock:
+            self._workers.add(worker)
+        return worker
+
+    def _replace(self, worker):
+        worker.kill()
+        with self._lock:
+            self._workers.discard(worker)
+            self.restarts += 1
+        return self._start_worker()
+
+    def _release(self, worker):
+        self._idle.put(worker)
+
+    def run(self, source, file_name="document.docx", **kwargs):
+        """format_document() у воркері. Повертає (bytes, звіт, тексти, метрики етапів).
+
+        source — bytes, двійковий file-like або шлях до файлу на диску (тоді
+        він передається воркеру без копіювання). Порушення лімітів і помилки
+        обробки піднімають ProcessingError.
+        """
+        size = _source_size(source)
+        if self.max_upload_bytes is not None and size > self.max_upload_bytes:
+            raise FileTooLarge(too_large_message(size, self.max_upload_bytes))
+
+        spooled = not isinstance(source, (str, os.PathLike))
+        input_path = _spool(source, self.spool_dir) if spooled else os.fspath(source)
+        fd, output_path = tempfile.mkstemp(dir=self.spool_dir, suffix=".docx")
+        os.close(fd)
+        worker = self._idle.get()
+        try:
+            worker.conn.send((input_path, output_path, dict(kwargs, file_name=file_name)))
+            status, report, texts, stages = self._wait(worker)
+            if status == "memory":
+                raise MemoryLimitExceeded(self._memory_message())
+            if status == "error":
+                raise ProcessingError(f"❌ Помилка обробки: {report}")
+            with open(output_path, "rb") as f:
+                fixed = f.read()
+            rss = worker.rss()
+            if self.max_rss_bytes is not None and rss is not None and rss > self.max_rss_bytes * RECYCLE_RSS_FRACTION:
+                worker = self._replace(worker)
+            return fixed, report, texts, stages
+        except (ProcessingTimeout, MemoryLimitExceeded, EOFError, OSError) as exc:
+            worker = self._replace(worker)
+            if isinstance(exc, ProcessingError):
+                raise
+            raise ProcessingError("❌ Процес обробки аварійно завершився") from exc
+        finally:
+            self._release(worker)
+            for path in (input_path, output_path) if spooled else (output_path,):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+    def _wait(self, worker):
+        deadline = time.monotonic() + self.timeout if self.timeout is not None else None
+        while not worker.conn.poll(POLL_INTERVAL):
+            if not worker.process.is_alive():
+                raise EOFError("worker exited")
+            if deadline is not None and time.monotonic() > deadline:
+                raise ProcessingTimeout(f"❌ Обробку перервано: перевищено ліміт часу {self.timeout:g} с")
+            if self.max_rss_bytes is not None:
+                rss = worker.rss()
+                if rss is not None and rss > self.max_rss_bytes:
+                    raise MemoryLimitExceeded(self._memory_message())
+        return worker.conn.recv()
+
+    def _memory_message(self):
+        return f"❌ Обробку перервано: перевищено ліміт пам'яті {self.max_rss_bytes / 1024 / 1024:.0f} МБ"
+
+    def close(self):
+        with self._lock:
+            workers, self._workers = list(self._workers), set()
+        for worker in workers:
+            worker.stop()